@@ -6,8 +6,39 @@ Telegram 通知模块
 
 import os
 import re
+from functools import lru_cache
+
 import requests
 
+# orjson 是 C 实现的 JSON 编解码器，请求体序列化和响应解析都快数倍；
+# 未安装时回退到标准库
+try:
+    import orjson as _json
+
+    def _json_dumps_bytes(obj) -> bytes:
+        return _json.dumps(obj)
+except ImportError:
+    import json as _json
+
+    def _json_dumps_bytes(obj) -> bytes:
+        return _json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
+# 请求体自行序列化为 JSON 字节串后需要显式声明 Content-Type
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+from core.utils import make_session
+
+# 复用同一个 Session，对 api.telegram.org 的多次请求走 HTTP keep-alive
+# （双语通知、发送后编辑都是连续请求）；带重试适配器处理瞬时连接错误
+_SESSION = make_session()
+
+
+# Telegram Markdown 特殊字符: _ * [ ] ( ) ~ ` > # + - = | { } . !
+# 但我们只转义最常见的问题字符，保留 * 用于粗体
+# str.translate 的转换表在 C 层单遍扫描，比逐匹配回调的正则替换快得多
+_MD_ESCAPE_TABLE = str.maketrans({c: '\\' + c for c in r'_`[]()~>#+=|{}.!-'})
+
 
 def escape_markdown(text: str) -> str:
     """
@@ -19,81 +50,87 @@ def escape_markdown(text: str) -> str:
     Returns:
         str: 转义后的文本
     """
-    # Telegram Markdown 特殊字符: _ * [ ] ( ) ~ ` > # + - = | { } . !
-    # 但我们只转义最常见的问题字符，保留 * 用于粗体
-    escape_chars = r'_`\[\]()~>#+=|{}.!-'
-    return re.sub(f'([{re.escape(escape_chars)}])', r'\\\1', text)
-
-
-def process_message_for_markdown_v2(text: str) -> str:
-    """处理消息，保留粗体标记、超链接和代码块，转义其他特殊字符"""
-    # 先提取并保护超链接 [text](url)
-    link_pattern = r'\[([^\]]+)\]\(([^)]+)\)'
-    links = []
-    link_placeholder = "\x00LINK{}\x00"
-
-    def save_link(match):
-        idx = len(links)
-        links.append((match.group(1), match.group(2)))
-        return link_placeholder.format(idx)
+    return text.translate(_MD_ESCAPE_TABLE)
 
-    text = re.sub(link_pattern, save_link, text)
 
-    # 提取并保护代码块 `code`
-    code_pattern = r'`([^`]+)`'
-    codes = []
-    code_placeholder = "\x01CODE{}\x01"
+# 超链接/代码块/粗体的合并 token 模式：同一位置按分支顺序取优先级
+_MD_TOKENS_RE = re.compile(
+    r'\[(?P<link_text>[^\]]+)\]\((?P<link_url>[^)]+)\)'
+    r'|`(?P<code>[^`]+)`'
+    r'|\*(?P<bold>[^*]+)\*'
+)
 
-    def save_code(match):
-        idx = len(codes)
-        codes.append(match.group(1))
-        return code_placeholder.format(idx)
 
-    text = re.sub(code_pattern, save_code, text)
-
-    # 处理粗体
-    bold_pattern = r'\*([^*]+)\*'
+def _render_tokens(text: str) -> str:
+    """tokenize 并拼接输出（粗体内容递归处理嵌套的链接/代码）"""
     parts = []
     last_end = 0
 
-    for match in re.finditer(bold_pattern, text):
-        before_text = text[last_end:match.start()]
-        parts.append(escape_markdown(before_text))
-        bold_content = match.group(1)
-        escaped_bold = escape_markdown(bold_content)
-        parts.append(f'*{escaped_bold}*')
+    for match in _MD_TOKENS_RE.finditer(text):
+        # token 之间的普通文本整体转义
+        parts.append(escape_markdown(text[last_end:match.start()]))
+
+        if match.group('link_text') is not None:
+            # 链接文本转义，URL 原样保留
+            escaped_text = escape_markdown(match.group('link_text'))
+            parts.append(f"[{escaped_text}]({match.group('link_url')})")
+        elif match.group('code') is not None:
+            # 代码内容需要转义特殊字符，但保留反引号格式
+            parts.append(f"`{escape_markdown(match.group('code'))}`")
+        else:
+            # 粗体内容可能嵌套链接（如通知标题 *xxx [版本](url) Released*），
+            # 递归 tokenize 而不是整体转义，否则链接会被转义成纯文本
+            parts.append(f"*{_render_tokens(match.group('bold'))}*")
+
         last_end = match.end()
 
     parts.append(escape_markdown(text[last_end:]))
-    result = ''.join(parts)
+    return ''.join(parts)
+
+
+@lru_cache(maxsize=32)
+def process_message_for_markdown_v2(text: str) -> str:
+    """
+    处理消息，保留粗体标记、超链接和代码块，转义其他特殊字符
+
+    单遍 tokenize：一次 finditer 同时识别三种标记，逐段拼接输出，
+    替代原先的占位符保护 + 多轮替换方案；结果按输入缓存，
+    发送后紧接着编辑同一内容时不会重复处理
+    """
+    # 不含任何标记字符的消息直接整体转义，跳过 tokenize
+    if '[' not in text and '`' not in text and '*' not in text:
+        return escape_markdown(text)
+
+    return _render_tokens(text)
 
-    # 恢复超链接
-    for idx, (link_text, link_url) in enumerate(links):
-        escaped_text = escape_markdown(link_text)
-        placeholder = escape_markdown(link_placeholder.format(idx))
-        result = result.replace(placeholder, f'[{escaped_text}]({link_url})')
 
-    # 恢复代码块（代码内容需要转义特殊字符，但保留反引号格式）
-    for idx, code_content in enumerate(codes):
-        escaped_code = escape_markdown(code_content)
-        placeholder = escape_markdown(code_placeholder.format(idx))
-        result = result.replace(placeholder, f'`{escaped_code}`')
+# MarkdownV2 元字符集合：消息完全不含这些字符时无需转义，
+# 也无需让服务端跑 Markdown 解析，直接纯文本发送
+_MD_META_CHARS = frozenset('_*[]()~`>#+=|{}.!\\-')
 
-    return result
+
+# clean_for_telegram 的清理模式（模块加载时编译一次）
+_HEADING_MARK_RE = re.compile(r'^#{1,6}\s*', re.MULTILINE)
+_VERSION_LINE_RE = re.compile(r'^\d+\.\d+\.\d+\s*$', re.MULTILINE)
+_DASH_BULLET_RE = re.compile(r'^- ', re.MULTILINE)
 
 
 def clean_for_telegram(text: str, remove_version: bool = False) -> str:
     """清理内容，移除 Telegram 不支持的 Markdown 语法"""
+    # 先用廉价的子串检查做门控：不含相关标记的正文跳过对应的正则扫描
     # 移除 ## 标题标记
-    text = re.sub(r'^#{1,6}\s*', '', text, flags=re.MULTILINE)
+    if '#' in text:
+        text = _HEADING_MARK_RE.sub('', text)
     # 移除版本号行（如单独的 "2.0.56" 行）
     if remove_version:
-        text = re.sub(r'^\d+\.\d+\.\d+\s*$', '', text, flags=re.MULTILINE)
+        text = _VERSION_LINE_RE.sub('', text)
     # 替换列表符号 "- " 为 "• "
-    text = re.sub(r'^- ', '• ', text, flags=re.MULTILINE)
+    if '- ' in text:
+        text = _DASH_BULLET_RE.sub('• ', text)
 
-    # 清理多余空行
-    text = re.sub(r'\n{3,}', '\n\n', text)
+    # 清理多余空行（固定模式用 C 层的 str.replace 循环比正则快）
+    while '\n\n\n' in text:
+        text = text.replace('\n\n\n', '\n\n')
     return text.strip()
 
 
@@ -124,19 +161,27 @@ def send_telegram_message(message: str, bot_token: str = None, chat_id: str = No
 
     url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
 
-    processed_message = process_message_for_markdown_v2(message)
-
     data = {
         "chat_id": chat_id,
-        "text": processed_message,
-        "parse_mode": "MarkdownV2",
+        "text": message,
         "disable_web_page_preview": True,
     }
+    # 含元字符才走转义流水线并声明 parse_mode；纯文本消息原样发送
+    if not _MD_META_CHARS.isdisjoint(message):
+        data["text"] = process_message_for_markdown_v2(message)
+        data["parse_mode"] = "MarkdownV2"
 
     try:
-        response = requests.post(url, json=data, timeout=10)
+        # 自行序列化请求体，跳过 requests 内部的 json.dumps
+        response = _SESSION.post(url, data=_json_dumps_bytes(data),
+                                 headers=_JSON_HEADERS, timeout=10)
+        # 429 时带回 Telegram 给出的 retry_after，调用方可按它退避
+        if response.status_code == 429:
+            retry_after = _json.loads(response.content).get("parameters", {}).get("retry_after", 0)
+            print(f"Telegram 限流 (429)，建议等待 {retry_after} 秒")
+            return {"success": False, "message_id": None, "retry_after": retry_after}
         response.raise_for_status()
-        result = response.json()
+        result = _json.loads(response.content)
         message_id = result.get("result", {}).get("message_id")
         print(f"Telegram 通知发送成功 (message_id: {message_id})")
         return {"success": True, "message_id": message_id}
@@ -177,20 +222,21 @@ def edit_telegram_message(
 
     url = f"https://api.telegram.org/bot{bot_token}/editMessageText"
 
-    processed_message = process_message_for_markdown_v2(message)
-
     data = {
         "chat_id": chat_id,
         "message_id": message_id,
-        "text": processed_message,
-        "parse_mode": "MarkdownV2",
+        "text": message,
         "disable_web_page_preview": True,
     }
+    if not _MD_META_CHARS.isdisjoint(message):
+        data["text"] = process_message_for_markdown_v2(message)
+        data["parse_mode"] = "MarkdownV2"
 
     try:
-        response = requests.post(url, json=data, timeout=10)
+        response = _SESSION.post(url, data=_json_dumps_bytes(data),
+                                 headers=_JSON_HEADERS, timeout=10)
         # 先检查响应内容，处理 Telegram API 特定错误
-        result = response.json()
+        result = _json.loads(response.content)
         if not result.get("ok"):
             error_desc = result.get("description", "").lower()
             if "message is not modified" in error_desc:
@@ -223,12 +269,10 @@ def _build_bilingual_messages(
 
     Returns:
         dict: {
-            "en_message": str,      # 英文消息
-            "cn_message": str,      # 中文消息
             "combined_message": str, # 合并消息
             "is_oversized": bool,   # 合并消息是否超长
-            "en_title": str,        # 英文标题
-            "cn_title": str         # 中文标题
+            "combined_length": int, # 处理后消息长度（估算或实测）
+            "en_title": str         # 英文标题
         }
     """
     # 清理内容
@@ -239,19 +283,8 @@ def _build_bilingual_messages(
     # 构建标题
     if version_url:
         en_title = f"*{title} [{version}]({version_url}) Released*"
-        cn_title = f"*{title} [{version}]({version_url}) 发布*"
     else:
         en_title = f"*{title} {version} Released*"
-        cn_title = f"*{title} {version} 发布*"
-
-    # 构建英文消息
-    en_lines = [en_title, "", original_en] if title else [original_en]
-    en_message = "\n".join(en_lines)
-
-    # 构建中文消息
-    cn_content = translated_clean if translated_clean else "（无翻译）"
-    cn_lines = [cn_title, "", cn_content] if title else [cn_content]
-    cn_message = "\n".join(cn_lines)
 
     # 构建合并消息
     combined_lines = [en_title, "", original_en] if title else [original_en]
@@ -259,18 +292,21 @@ def _build_bilingual_messages(
         combined_lines.extend(["", translated_clean])
     combined_message = "\n".join(combined_lines)
 
-    # 检测消息长度
-    processed_combined = process_message_for_markdown_v2(combined_message)
-    is_oversized = len(processed_combined) > MAX_MESSAGE_LENGTH
+    # 检测消息长度：转义最多让每个字符翻倍，原始长度不到限制一半时
+    # 必然不超长，跳过整次 MarkdownV2 处理（该处理是这里最热的调用）
+    if len(combined_message) * 2 < MAX_MESSAGE_LENGTH:
+        is_oversized = False
+        combined_length = len(combined_message)
+    else:
+        processed_combined = process_message_for_markdown_v2(combined_message)
+        is_oversized = len(processed_combined) > MAX_MESSAGE_LENGTH
+        combined_length = len(processed_combined)
 
     return {
-        "en_message": en_message,
-        "cn_message": cn_message,
         "combined_message": combined_message,
         "is_oversized": is_oversized,
-        "combined_length": len(processed_combined),
-        "en_title": en_title,
-        "cn_title": cn_title
+        "combined_length": combined_length,
+        "en_title": en_title
     }
 
 
@@ -340,13 +376,19 @@ def send_bilingual_notification(
         return {
             "success": result["success"],
             "message_ids": message_ids,
-            "telegraph_url": telegraph_url
+            "telegraph_url": telegraph_url,
+            "retry_after": result.get("retry_after", 0)
         }
 
     # 长度在限制内，发送合并消息
     result = send_telegram_message(msgs["combined_message"], bot_token, chat_id)
     message_ids = [result["message_id"]] if result["message_id"] else []
-    return {"success": result["success"], "message_ids": message_ids, "telegraph_url": None}
+    return {
+        "success": result["success"],
+        "message_ids": message_ids,
+        "telegraph_url": None,
+        "retry_after": result.get("retry_after", 0)
+    }
 
 
 def edit_bilingual_notification(
@@ -6,15 +6,71 @@ Telegraph 发布模块
 用于将超长内容发布到 Telegraph，并返回文章链接
 """
 
+import hashlib
 import json
 import os
 import re
+from html.parser import HTMLParser
 
 import requests
 
+# orjson 是 C 实现的 JSON 编解码器，节点数组序列化和响应解析都快数倍；
+# 未安装时回退到标准库
+try:
+    import orjson as _json
+
+    def _json_dumps(obj) -> str:
+        return _json.dumps(obj).decode()
+except ImportError:
+    import json as _json
+
+    def _json_dumps(obj) -> str:
+        return _json.dumps(obj)
+
+from core.utils import make_session
+
 # Telegraph API 基础 URL
 TELEGRAPH_API = "https://api.telegra.ph"
 
+# 复用同一个 Session，发布重试时走 HTTP keep-alive；带重试适配器
+_SESSION = make_session()
+
+# 获取项目根目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 已发布页面缓存：内容哈希 -> 文章 URL；同一版本同样内容重复发布时
+# 直接复用上次的链接，省掉 HTML 构建和 Telegraph API 往返
+PAGE_CACHE_FILE = os.path.join(PROJECT_ROOT, "output", "telegraph_cache.json")
+
+_page_cache = None
+
+
+def _load_page_cache():
+    """加载已发布页面缓存（首次访问时读取），失败时返回空字典"""
+    global _page_cache
+    if _page_cache is not None:
+        return _page_cache
+
+    _page_cache = {}
+    if os.path.exists(PAGE_CACHE_FILE):
+        try:
+            with open(PAGE_CACHE_FILE, 'rb') as f:
+                _page_cache = _json.loads(f.read())
+        except Exception as e:
+            print(f"读取 Telegraph 页面缓存失败: {e}")
+    return _page_cache
+
+
+def _save_page_cache():
+    """保存已发布页面缓存（先写临时文件再替换）"""
+    try:
+        os.makedirs(os.path.dirname(PAGE_CACHE_FILE), exist_ok=True)
+        tmp_file = PAGE_CACHE_FILE + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(_page_cache, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, PAGE_CACHE_FILE)
+    except Exception as e:
+        print(f"保存 Telegraph 页面缓存失败: {e}")
+
 
 def get_token() -> str | None:
     """
@@ -32,6 +88,32 @@ def get_token() -> str | None:
     return token
 
 
+# markdown_to_html 用的模式，模块加载时编译一次
+_FENCED_CODE_RE = re.compile(r'```[\w]*\n(.*?)\n```', re.DOTALL)
+_HEADING_RE = re.compile(r'^(#{1,3}) (.+)$')
+_LIST_ITEM_RE = re.compile(r'^[-•]\s+(.+)$')
+_INLINE_CODE_RE = re.compile(r'`([^`]+)`')
+_BOLD_STAR_RE = re.compile(r'\*\*(.+?)\*\*')
+_BOLD_UNDERSCORE_RE = re.compile(r'__(.+?)__')
+# 斜体需要避免与粗体冲突，只匹配单个 * 或 _
+_ITALIC_STAR_RE = re.compile(r'(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)')
+_ITALIC_UNDERSCORE_RE = re.compile(r'(?<!_)_(?!_)(.+?)(?<!_)_(?!_)')
+_LINK_RE = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
+# 代码块占位符（逐行处理时保持代码块整体不被拆散）
+_PRE_PLACEHOLDER = "\x00PRE{}\x00"
+
+
+def _convert_inline(line: str) -> str:
+    """对单行文本应用行内转换（代码、粗体、斜体、链接）"""
+    line = _INLINE_CODE_RE.sub(r'<code>\1</code>', line)
+    line = _BOLD_STAR_RE.sub(r'<b>\1</b>', line)
+    line = _BOLD_UNDERSCORE_RE.sub(r'<b>\1</b>', line)
+    line = _ITALIC_STAR_RE.sub(r'<i>\1</i>', line)
+    line = _ITALIC_UNDERSCORE_RE.sub(r'<i>\1</i>', line)
+    line = _LINK_RE.sub(r'<a href="\2">\1</a>', line)
+    return line
+
+
 def markdown_to_html(text: str) -> str:
     """
     将 Markdown 格式转换为 Telegraph 支持的 HTML
@@ -40,62 +122,68 @@ def markdown_to_html(text: str) -> str:
     a, aside, b, blockquote, br, code, em, figcaption, figure,
     h3, h4, hr, i, iframe, img, li, ol, p, pre, s, strong, u, ul, video
 
+    单遍逐行转换：先把多行代码块抠成占位符，然后在一次行循环里
+    识别标题/列表项/段落，行内转换只作用于当前行，避免对整篇文本
+    反复做全局替换
+
     Args:
         text: Markdown 格式文本
 
     Returns:
         str: HTML 格式文本
     """
-    # 处理标题 ## -> <h3>, ### -> <h4>
-    text = re.sub(r'^## (.+)$', r'<h3>\1</h3>', text, flags=re.MULTILINE)
-    text = re.sub(r'^### (.+)$', r'<h4>\1</h4>', text, flags=re.MULTILINE)
-    text = re.sub(r'^# (.+)$', r'<h3>\1</h3>', text, flags=re.MULTILINE)
-
-    # 处理代码块 ```code``` -> <pre>code</pre>
-    text = re.sub(r'```[\w]*\n(.*?)\n```', r'<pre>\1</pre>', text, flags=re.DOTALL)
-
-    # 处理行内代码 `code` -> <code>code</code>
-    text = re.sub(r'`([^`]+)`', r'<code>\1</code>', text)
-
-    # 处理粗体 **text** 或 __text__ -> <b>text</b>
-    text = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', text)
-    text = re.sub(r'__(.+?)__', r'<b>\1</b>', text)
+    # 提取代码块 ```code``` -> 占位符（代码内容不做行内转换）
+    code_blocks = []
 
-    # 处理斜体 *text* 或 _text_ -> <i>text</i>
-    # 注意：需要避免与粗体冲突，只匹配单个 * 或 _
-    text = re.sub(r'(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)', r'<i>\1</i>', text)
-    text = re.sub(r'(?<!_)_(?!_)(.+?)(?<!_)_(?!_)', r'<i>\1</i>', text)
+    def _save_code_block(match):
+        code_blocks.append(match.group(1))
+        return _PRE_PLACEHOLDER.format(len(code_blocks) - 1)
 
-    # 处理链接 [text](url) -> <a href="url">text</a>
-    text = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', r'<a href="\2">\1</a>', text)
+    text = _FENCED_CODE_RE.sub(_save_code_block, text)
 
-    # 处理无序列表
-    # 先找出连续的列表项，包装成 <ul>
-    lines = text.split('\n')
     result_lines = []
     in_list = False
     list_items = []
 
-    for line in lines:
-        # 检查是否是列表项 (- 或 •)
-        list_match = re.match(r'^[-•]\s+(.+)$', line)
+    for line in text.split('\n'):
+        # 列表项 (- 或 •)，连续的列表项包装成 <ul>
+        list_match = _LIST_ITEM_RE.match(line)
         if list_match:
             if not in_list:
                 in_list = True
                 list_items = []
-            list_items.append(f"<li>{list_match.group(1)}</li>")
+            list_items.append(f"<li>{_convert_inline(list_match.group(1))}</li>")
+            continue
+
+        if in_list:
+            # 结束列表
+            result_lines.append("<ul>" + "".join(list_items) + "</ul>")
+            in_list = False
+            list_items = []
+
+        # 标题 ## -> <h3>, ### -> <h4>, # -> <h3>
+        heading_match = _HEADING_RE.match(line)
+        if heading_match:
+            tag = "h4" if len(heading_match.group(1)) == 3 else "h3"
+            result_lines.append(f"<{tag}>{_convert_inline(heading_match.group(2))}</{tag}>")
+            continue
+
+        stripped = line.strip()
+        if not stripped:
+            continue
+
+        # 还原代码块占位符 -> <pre>code</pre>
+        if stripped.startswith("\x00PRE"):
+            idx = int(stripped[4:-1])
+            result_lines.append(f"<pre>{code_blocks[idx]}</pre>")
+            continue
+
+        # 普通段落（行内转换后已是标签开头的行原样保留）
+        converted = _convert_inline(stripped)
+        if converted.startswith('<'):
+            result_lines.append(converted)
         else:
-            if in_list:
-                # 结束列表
-                result_lines.append("<ul>" + "".join(list_items) + "</ul>")
-                in_list = False
-                list_items = []
-            # 处理普通段落（非空行且不是标签）
-            stripped = line.strip()
-            if stripped and not stripped.startswith('<'):
-                result_lines.append(f"<p>{stripped}</p>")
-            elif stripped:
-                result_lines.append(stripped)
+            result_lines.append(f"<p>{converted}</p>")
 
     # 处理最后可能未结束的列表
     if in_list:
@@ -137,7 +225,7 @@ def create_page(
     data = {
         "access_token": token,
         "title": title,
-        "content": json.dumps(content),
+        "content": _json_dumps(content),
         "author_name": author_name,
         "return_content": False,
     }
@@ -145,8 +233,8 @@ def create_page(
         data["author_url"] = author_url
 
     try:
-        response = requests.post(f"{TELEGRAPH_API}/createPage", data=data, timeout=30)
-        result = response.json()
+        response = _SESSION.post(f"{TELEGRAPH_API}/createPage", data=data, timeout=30)
+        result = _json.loads(response.content)
 
         if result.get("ok"):
             page = result["result"]
@@ -166,11 +254,63 @@ def create_page(
         return {"success": False, "url": None, "path": None, "error": str(e)}
 
 
+# 无内容的自闭合标签
+_VOID_TAGS = {"hr", "br"}
+
+
+class _NodeParser(HTMLParser):
+    """
+    把 HTML 流式解析成 Telegraph Node 树（内部辅助类）
+
+    用标签栈维护当前位置，整个解析只扫一遍输入，
+    嵌套深度不影响扫描次数
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = []
+        self._stack = [self.root]
+
+    def _children(self):
+        """当前栈顶节点的子节点列表"""
+        top = self._stack[-1]
+        return top if isinstance(top, list) else top["children"]
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _VOID_TAGS:
+            self._children().append({"tag": tag})
+            return
+
+        node = {"tag": tag}
+        # 解析属性（主要是 href）
+        href = dict(attrs).get("href")
+        if href:
+            node["attrs"] = {"href": href}
+        node["children"] = []
+
+        self._children().append(node)
+        self._stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in _VOID_TAGS:
+            self._children().append({"tag": tag})
+
+    def handle_endtag(self, tag):
+        # 只在与栈顶匹配时出栈，容忍不配对的结束标签
+        if len(self._stack) > 1 and self._stack[-1]["tag"] == tag:
+            self._stack.pop()
+
+    def handle_data(self, data):
+        # 标签之间的格式化空白（换行缩进）不产生节点
+        if data.strip():
+            self._children().append(data)
+
+
 def html_to_nodes(html: str) -> list:
     """
     将 HTML 字符串转换为 Telegraph Node 格式
 
-    简化实现：按标签拆分，转换为 Node 数组
+    基于 html.parser 的单遍栈式解析，替代原先逐层递归的正则拆分
 
     Args:
         html: HTML 格式字符串
@@ -178,56 +318,10 @@ def html_to_nodes(html: str) -> list:
     Returns:
         list: Telegraph Node 数组
     """
-    nodes = []
-
-    # 简单的 HTML 标签解析正则
-    tag_pattern = re.compile(r'<(h3|h4|p|ul|li|pre|code|b|i|a)([^>]*)>(.*?)</\1>|<(hr|br)\s*/?>|([^<]+)', re.DOTALL)
-
-    for match in tag_pattern.finditer(html):
-        if match.group(1):  # 有内容的标签
-            tag = match.group(1)
-            attrs_str = match.group(2)
-            inner = match.group(3)
-
-            node = {"tag": tag}
-
-            # 解析属性（主要是 href）
-            if attrs_str:
-                href_match = re.search(r'href=["\']([^"\']+)["\']', attrs_str)
-                if href_match:
-                    node["attrs"] = {"href": href_match.group(1)}
-
-            # 递归处理子内容
-            if tag == "ul":
-                # 列表项需要特殊处理
-                li_pattern = re.compile(r'<li>(.*?)</li>', re.DOTALL)
-                children = []
-                for li_match in li_pattern.finditer(inner):
-                    li_content = li_match.group(1)
-                    # 如果内容包含 HTML 标签，递归处理；否则直接使用文本
-                    if "<" in li_content:
-                        li_children = html_to_nodes(li_content)
-                    else:
-                        li_children = [li_content] if li_content else []
-                    children.append({"tag": "li", "children": li_children})
-                node["children"] = children
-            elif "<" in inner:
-                # 内部还有标签，递归处理
-                node["children"] = html_to_nodes(inner)
-            else:
-                # 纯文本
-                node["children"] = [inner] if inner else []
-
-            nodes.append(node)
-        elif match.group(4):  # 自闭合标签 (hr, br)
-            tag = match.group(4)
-            nodes.append({"tag": tag})
-        elif match.group(5):  # 纯文本
-            text = match.group(5).strip()
-            if text:
-                nodes.append(text)
-
-    return nodes
+    parser = _NodeParser()
+    parser.feed(html)
+    parser.close()
+    return parser.root
 
 
 # 产品作者信息映射
@@ -285,6 +379,17 @@ def publish_changelog(
     Returns:
         dict: {"success": bool, "url": str | None}
     """
+    # 相同内容重复发布（重试/编辑路径会再次走到这里）直接复用缓存的链接
+    cache_key = hashlib.blake2b(
+        f"{title}|{version}|{original}|{translated}".encode('utf-8'),
+        digest_size=16
+    ).hexdigest()
+    cache = _load_page_cache()
+    cached_url = cache.get(cache_key)
+    if cached_url:
+        print(f"Telegraph 文章已发布过，复用链接: {cached_url}")
+        return {"success": True, "url": cached_url, "path": None, "error": None}
+
     # 构建文章标题
     page_title = f"{title} {version} Release Notes" if version else f"{title} Release Notes"
 
@@ -304,13 +409,18 @@ def publish_changelog(
     content_html = _build_html(original, translated)
     result = create_page(page_title, content_html, author_name=author_name, author_url=author_url)
 
-    if result["success"] or result.get("error") != "CONTENT_TOO_BIG":
-        return result
+    if not result["success"] and result.get("error") == "CONTENT_TOO_BIG":
+        # 第二次尝试：截掉 Changelog 部分后重试
+        trimmed_original = _strip_changelog_section(original)
+        trimmed_translated = _strip_changelog_section(translated) if translated else None
+        print("内容过大，截掉 Changelog 详细列表后重试 Telegraph 发布...")
+
+        content_html = _build_html(trimmed_original, trimmed_translated)
+        result = create_page(page_title, content_html, author_name=author_name, author_url=author_url)
 
-    # 第二次尝试：截掉 Changelog 部分后重试
-    trimmed_original = _strip_changelog_section(original)
-    trimmed_translated = _strip_changelog_section(translated) if translated else None
-    print("内容过大，截掉 Changelog 详细列表后重试 Telegraph 发布...")
+    # 发布成功后记录内容哈希 -> 链接（截断重试成功的也按原始内容记录）
+    if result["success"] and result.get("url"):
+        cache[cache_key] = result["url"]
+        _save_page_cache()
 
-    content_html = _build_html(trimmed_original, trimmed_translated)
-    return create_page(page_title, content_html, author_name=author_name, author_url=author_url)
+    return result
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+产品本地状态持久化
+各产品检查脚本共用的版本记录、ETag、消息状态读写逻辑，
+文件路径由调用方传入，新增产品时不必再复制这组函数
+"""
+
+import hashlib
+import json
+import os
+
+from core.utils import atomic_write_text, atomic_write_json
+
+
+def compute_body_hash(body):
+    """计算 body 内容的指纹（blake2b 比 md5 快且不受 FIPS 模式限制）"""
+    if not body:
+        return ""
+    return hashlib.blake2b(body.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class TrackerState:
+    """
+    某个产品的本地状态文件集合（版本记录、ETag、消息状态）
+
+    所有方法失败时打印错误并返回安全的默认值，不抛异常，
+    与各检查脚本原有的错误处理约定一致；写入都走原子写入
+    """
+
+    def __init__(self, version_file, message_state_file, etag_file):
+        self.version_file = version_file
+        self.message_state_file = message_state_file
+        self.etag_file = etag_file
+
+    def read_etag(self):
+        """读取本地保存的 ETag"""
+        if not os.path.exists(self.etag_file):
+            return None
+
+        try:
+            with open(self.etag_file, 'r', encoding='utf-8') as f:
+                return f.read().strip() or None
+        except Exception as e:
+            print(f"读取 ETag 文件失败: {e}")
+            return None
+
+    def save_etag(self, etag):
+        """保存 ETag 到本地文件（原子写入）"""
+        if not etag:
+            return
+        try:
+            atomic_write_text(self.etag_file, etag)
+        except Exception as e:
+            print(f"保存 ETag 失败: {e}")
+
+    def read_version(self):
+        """读取本地保存的版本号"""
+        if not os.path.exists(self.version_file):
+            return None
+
+        try:
+            with open(self.version_file, 'r', encoding='utf-8') as f:
+                return f.read().strip()
+        except Exception as e:
+            print(f"读取本地版本文件失败: {e}")
+            return None
+
+    def save_version(self, version):
+        """保存版本号到本地文件（原子写入，避免写一半时崩溃留下坏文件）"""
+        try:
+            atomic_write_text(self.version_file, version)
+            return True
+        except Exception as e:
+            print(f"保存版本信息失败: {e}")
+            return False
+
+    def read_message_state(self):
+        """
+        读取消息状态文件
+
+        Returns:
+            dict: {"version": str, "message_ids": list, "body_hash": str} 或 None
+        """
+        if not os.path.exists(self.message_state_file):
+            return None
+
+        try:
+            with open(self.message_state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"读取消息状态文件失败: {e}")
+            return None
+
+    def save_message_state(self, version, message_ids, body_hash):
+        """
+        保存消息状态到文件
+
+        Args:
+            version: 版本号
+            message_ids: Telegram 消息 ID 列表
+            body_hash: body 内容的 hash 值
+        """
+        try:
+            state = {
+                "version": version,
+                "message_ids": message_ids,
+                "body_hash": body_hash
+            }
+            atomic_write_json(self.message_state_file, state, indent=2)
+            return True
+        except Exception as e:
+            print(f"保存消息状态失败: {e}")
+            return False
+
+    def clear_message_state(self):
+        """清理消息状态文件（用于消息已删除等无法恢复的情况）"""
+        try:
+            if os.path.exists(self.message_state_file):
+                os.remove(self.message_state_file)
+                print("消息状态已清理")
+            return True
+        except Exception as e:
+            print(f"清理消息状态失败: {e}")
+            return False
@@ -1 +1,9 @@
-from .llm import translate_changelog, summarize_changelog
+from .llm import (
+    translate_changelog,
+    summarize_changelog,
+    translate_changelogs_batch,
+    atranslate_changelog,
+    asummarize_changelog,
+    atranslate_changelogs_batch,
+)
+from .cache import cached_translate, cached_translate_batch, flush_translation_cache
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+翻译结果缓存
+按内容 hash 缓存 translate_changelog 的结果，相同内容的重复翻译
+（如 --all 推送中断后重跑）直接命中缓存，省去整次 LLM 调用
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+from .llm import translate_changelog, translate_changelogs_batch
+
+# 缓存文件位于项目 output 目录（与版本记录文件同级）
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CACHE_FILE = os.path.join(PROJECT_ROOT, "output", "translation_cache.json")
+
+# 提示词模板版本号：修改 llm.py 里的翻译规则后递增，旧缓存自然失效
+PROMPT_VERSION = 1
+
+# 进程内缓存：首次使用时从磁盘加载，新翻译写入后标记待刷盘。
+# 推送脚本会从翻译预取线程池并发调用 cached_translate*，加载和
+# 读写都要持锁，否则并发的首次加载会把别的线程刚写入的条目整个
+# 顶掉（丢缓存 = 白花一次 LLM 调用）；LLM 调用本身在锁外进行
+_cache = None
+_dirty = False
+_cache_lock = threading.Lock()
+
+# 骨架归一化：去掉行内代码、链接和数字并折叠空白后转小写，
+# 两个版本的更新日志若只差 PR 编号、URL 或空白排版，骨架相同
+_SKELETON_NOISE_RE = re.compile(r'`[^`]*`|https?://\S+|\d+')
+_SKELETON_WS_RE = re.compile(r'\s+')
+
+
+def _make_keys(body):
+    """
+    生成缓存键：(精确键, 骨架键)
+
+    精确键对原文做 sha256；骨架键对归一化骨架做 sha256，
+    捕获只差编号/链接/空白的近似重复。两个键都带上模型名和
+    提示词版本号，换模型或改提示词后旧缓存自然失效。
+    """
+    model = os.getenv("LLM_MODEL", "openrouter/google/gemini-2.5-flash")
+    exact = hashlib.sha256(
+        f"{model}|{PROMPT_VERSION}|{body}".encode('utf-8')
+    ).hexdigest()
+    skeleton = _SKELETON_WS_RE.sub(
+        ' ', _SKELETON_NOISE_RE.sub('', body.lower())
+    ).strip()
+    fuzzy = hashlib.sha256(
+        f"skeleton|{model}|{PROMPT_VERSION}|{skeleton}".encode('utf-8')
+    ).hexdigest()
+    return exact, fuzzy
+
+
+def _load_cache():
+    """加载磁盘缓存（仅首次调用时读盘）；调用方必须持有 _cache_lock"""
+    global _cache
+    if _cache is not None:
+        return _cache
+
+    cache = {}
+    if os.path.exists(CACHE_FILE):
+        try:
+            with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except Exception as e:
+            print(f"读取翻译缓存失败: {e}")
+            cache = {}
+    _cache = cache
+    return _cache
+
+
+def cached_translate(body):
+    """
+    带缓存的翻译
+
+    先按原文精确键查询，未命中再按归一化骨架键查询——只差
+    空白排版、PR 编号或 Full Changelog 链接的近似重复也能命中。
+    都未命中时调用 translate_changelog 并以两个键记录结果
+    （翻译失败返回空串时不缓存，下次仍会重试）。
+
+    Args:
+        body: 待翻译的更新日志文本
+
+    Returns:
+        中文翻译文本，失败时返回空字符串
+    """
+    global _dirty
+
+    if not body:
+        return ""
+
+    exact_key, fuzzy_key = _make_keys(body)
+    with _cache_lock:
+        cache = _load_cache()
+        if exact_key in cache:
+            return cache[exact_key]
+        if fuzzy_key in cache:
+            # 骨架命中时补写精确键，下次直接精确命中
+            cache[exact_key] = cache[fuzzy_key]
+            _dirty = True
+            return cache[fuzzy_key]
+
+    # LLM 调用在锁外进行，不阻塞其他线程的缓存命中
+    translated = translate_changelog(body)
+    if translated:
+        with _cache_lock:
+            cache[exact_key] = translated
+            cache[fuzzy_key] = translated
+            _dirty = True
+    return translated
+
+
+def cached_translate_batch(bodies):
+    """
+    带缓存的批量翻译
+
+    逐条先查缓存（精确键和骨架键），只把未命中的条目交给
+    translate_changelogs_batch 打包成共享前导的批量请求——
+    N 条未命中只花 ceil(N/批大小) 次 LLM 往返，而不是 N 次。
+    结果以两个键回写缓存，失败条目不缓存。
+
+    Args:
+        bodies: 待翻译的更新日志文本列表
+
+    Returns:
+        list[str]: 与输入等长的翻译结果列表，失败的条目为空字符串
+    """
+    global _dirty
+
+    results = [""] * len(bodies)
+    misses = []
+
+    with _cache_lock:
+        cache = _load_cache()
+        for idx, body in enumerate(bodies):
+            if not body:
+                continue
+            exact_key, fuzzy_key = _make_keys(body)
+            if exact_key in cache:
+                results[idx] = cache[exact_key]
+            elif fuzzy_key in cache:
+                cache[exact_key] = cache[fuzzy_key]
+                _dirty = True
+                results[idx] = cache[fuzzy_key]
+            else:
+                misses.append(idx)
+
+    if misses:
+        # 批量 LLM 调用在锁外进行，结果回写时再短暂持锁
+        translated_list = translate_changelogs_batch([bodies[i] for i in misses])
+        with _cache_lock:
+            for idx, translated in zip(misses, translated_list):
+                if translated:
+                    exact_key, fuzzy_key = _make_keys(bodies[idx])
+                    cache[exact_key] = translated
+                    cache[fuzzy_key] = translated
+                    _dirty = True
+                results[idx] = translated
+
+    return results
+
+
+def flush_translation_cache():
+    """将新增的翻译结果刷盘（先写临时文件再替换，避免写坏缓存）"""
+    global _dirty
+
+    # 持锁序列化整个刷盘：防止 json.dump 迭代时别的线程改写字典
+    with _cache_lock:
+        if not _dirty or _cache is None:
+            return
+
+        try:
+            os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+            tmp_file = CACHE_FILE + ".tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(_cache, f, ensure_ascii=False)
+            os.replace(tmp_file, CACHE_FILE)
+            _dirty = False
+        except Exception as e:
+            print(f"保存翻译缓存失败: {e}")
@@ -4,21 +4,141 @@
 翻译模块 - 使用 LiteLLM 调用 LLM API 进行翻译
 """
 
+import asyncio
+import math
 import os
+import random
 import re
-from litellm import completion
 
+# litellm 连带 pydantic/httpx/tiktoken 等重依赖，冷导入数百毫秒；
+# 延迟到第一次真正调用 LLM 时再加载，翻译缓存命中或跳过翻译的
+# 路径完全不付这笔开销
+_acompletion = None
+
+# 瞬时性错误（限流、超时、连接失败）重试前先退避；
+# 请求本身有问题（BadRequestError）重试也不会成功，直接放弃。
+# 具体异常类型由 _ensure_litellm 在首次调用时填充
+_RETRYABLE_ERRORS = ()
+_BAD_REQUEST_ERROR = ()
+
+
+def _ensure_litellm() -> None:
+    """首次需要时导入 litellm 并填充异常分类（之后为空操作）"""
+    global _acompletion, _RETRYABLE_ERRORS, _BAD_REQUEST_ERROR
+    if _acompletion is None:
+        from litellm import acompletion
+        from litellm.exceptions import (
+            APIConnectionError,
+            BadRequestError,
+            RateLimitError,
+            Timeout,
+        )
+        _acompletion = acompletion
+        _RETRYABLE_ERRORS = (RateLimitError, Timeout, APIConnectionError)
+        _BAD_REQUEST_ERROR = BadRequestError
 
 # 翻译质量检查：中文字符最低占比
 MIN_CHINESE_RATIO = 0.05  # 5%
 # 最大重试次数
 MAX_RETRIES = 2
+# 批量翻译单个请求最多打包的条数（控制总 prompt 不超出模型上下文）
+BATCH_SIZE = 6
+# 跳过翻译的判断：中文占比超过该值视为已是中文内容
+SKIP_CJK_RATIO = 0.5
+# 去掉代码块后少于该字符数的正文不值得翻译
+MIN_TRANSLATABLE_CHARS = 20
+
+# 识别围栏代码块（跳过翻译的长度判断时先剔除）
+_CODE_BLOCK_RE = re.compile(r'```.*?```', re.DOTALL)
+
+# 翻译规则和术语表（单条翻译与批量翻译共用同一份前导）
+_TRANSLATE_RULES = """关键要求（必须严格遵守）：
+- 逐行翻译，禁止总结、合并或重新组织内容
+- 每个列表项（以 - 或 • 开头的行）必须单独翻译，不能合并成段落
+- 保持原文的结构和格式不变，翻译后的行数应与原文基本一致
+- 不要添加标题、摘要或任何原文没有的内容
+
+翻译示例（必须遵守）：
+- "• Added new feature" → "• 新增功能"
+- "• Fixed bug in API" → "• 修复 API 中的错误"
+- "• Changed default behavior" → "• 变更默认行为"
+- "• Removed deprecated option" → "• 移除已弃用的选项"
+- "- fix: resolve issue" → "- fix: 解决问题"（commit 前缀 fix/feat/chore 等保留英文）
+
+格式要求：
+1. 保持 Markdown 格式不变（标题、列表、代码块等）
+2. 版本号、行内代码保持原样
+3. 以下内容保留英文原文：
+   - GitHub 用户名：@xxx 格式保持不变
+   - 通用术语：API, SDK, CLI, Token, OAuth, WebSocket, Streaming, LLM, Prompt
+   - 功能名称：Agent, Subagent, Sub-agent, Skill, Hook, Plugin, Plan Mode, Compact Mode, Background Task, Memory, TUI, Sandbox, Transcript Mode
+   - 斜杠命令：/compact, /context, /permissions, /mcp, /model, /resume, /export, /stats, /init, /prompts, /approvals
+   - 工具与概念：MCP, Model Context Protocol, Tool Use, Tool Call, Bash Tool, Permission, Thinking Block, Frontmatter, exec_command, apply_patch, prompt cache, reasoning effort
+   - 配置文件：settings.json, CLAUDE.md, config.toml, AGENTS.md, .mcp.json
+4. 语言流畅自然，符合中文技术文档习惯
+5. 对于不确定的专有名词，保留英文"""
+
+# 批量翻译响应的条目分隔解析
+_BATCH_ITEM_RE = re.compile(r'<<<ITEM (\d+)>>>(.*?)<<<END \1>>>', re.DOTALL)
+
+# 完整的静态提示词前缀在模块加载时拼好：每次调用只做一次 prefix +
+# content 拼接，静态部分字节级一致，支持前缀缓存的服务端可直接命中
+_TRANSLATE_PROMPT_PREFIX = (
+    "请将以下软件更新日志逐条翻译成中文，直接输出翻译结果。\n\n"
+    + _TRANSLATE_RULES
+    + "\n\n待翻译内容：\n"
+)
+
+_BATCH_PROMPT_PREFIX = (
+    "请将以下多条软件更新日志分别逐条翻译成中文。\n\n"
+    "每条内容由 <<<ITEM n>>> 和 <<<END n>>> 包裹。输出时必须保留同样的\n"
+    "分隔行：每条译文前输出 <<<ITEM n>>>，译文后输出 <<<END n>>>，\n"
+    "编号与原文一致，不要输出分隔行之外的任何额外内容。\n\n"
+    + _TRANSLATE_RULES
+    + "\n\n待翻译内容：\n"
+)
+
+
+# 中日韩统一表意文字区的删除表（模块加载时构建一次）
+_CJK_DELETE_TABLE = dict.fromkeys(range(0x4e00, 0x9fff + 1))
 
 
 def _count_chinese_chars(text: str) -> int:
-    """统计中文字符数量"""
-    chinese_pattern = re.compile(r'[\u4e00-\u9fff]')
-    return len(chinese_pattern.findall(text))
+    """统计中文字符数量（C 层 translate 删除中文后取长度差，不逐字符迭代）"""
+    return len(text) - len(text.translate(_CJK_DELETE_TABLE))
+
+
+# 质量检查分块统计的块大小：每块仍走 C 层 translate 计数，
+# 块间检查是否已可提前定论
+_QUALITY_CHUNK = 512
+
+
+def _passes_threshold(text: str, ratio: float) -> bool:
+    """
+    判断中文占比是否达到阈值，可提前退出
+
+    分块累计中文字符数：一旦累计数达到需求即通过，一旦剩余字符
+    全算中文也凑不够即失败——明显合格或明显不合格的译文只需扫描
+    开头一小段
+
+    Returns:
+        bool: True 表示占比 >= ratio
+    """
+    total = len(text)
+    needed = math.ceil(total * ratio)
+    if needed == 0:
+        return True
+
+    count = 0
+    for start in range(0, total, _QUALITY_CHUNK):
+        chunk = text[start:start + _QUALITY_CHUNK]
+        count += len(chunk) - len(chunk.translate(_CJK_DELETE_TABLE))
+        if count >= needed:
+            return True
+        remaining = total - start - len(chunk)
+        if count + remaining < needed:
+            return False
+    return False
 
 
 def _check_translation_quality(translated: str) -> bool:
@@ -31,24 +151,103 @@ def _check_translation_quality(translated: str) -> bool:
     if not translated:
         return False
 
-    chinese_count = _count_chinese_chars(translated)
-    total_length = len(translated)
+    return _passes_threshold(translated, MIN_CHINESE_RATIO)
 
-    if total_length == 0:
-        return False
 
-    chinese_ratio = chinese_count / total_length
+def _skip_translation_reason(content: str) -> str | None:
+    """
+    判断内容是否无需翻译（内部辅助函数）
 
-    return chinese_ratio >= MIN_CHINESE_RATIO
+    Returns:
+        str | None: 无需翻译时返回原因文案，需要翻译时返回 None
+    """
+    if not any(ch.isascii() and ch.isalpha() for ch in content):
+        return "内容不含英文文本"
+    if _count_chinese_chars(content) / len(content) > SKIP_CJK_RATIO:
+        return "内容已以中文为主"
+    stripped = _CODE_BLOCK_RE.sub('', content)
+    if len(stripped.strip()) < MIN_TRANSLATABLE_CHARS:
+        return "去除代码块后正文过短"
+    return None
 
 
-def translate_changelog(
+async def _retry_backoff(attempt: int) -> None:
+    """
+    重试前指数退避（内部辅助函数）
+
+    第 n 次重试前等 2^n 秒并加随机抖动，错开并发任务的重试时机，
+    避免同时撞上限流窗口
+    """
+    delay = 2 ** attempt + random.random()
+    print(f"等待 {delay:.1f} 秒后重试...")
+    await asyncio.sleep(delay)
+
+
+# 流式早停：累计输出超过该长度后检查一次中文占比
+_STREAM_ABORT_MIN_CHARS = 200
+# 低于该占比视为模型在原样输出英文，提前中断省下剩余 token
+_STREAM_ABORT_CJK_RATIO = 0.02
+
+
+async def _acomplete(
+    model: str,
+    api_key: str,
+    prompt: str,
+    early_abort: bool = False
+) -> str | None:
+    """
+    调用 LLM 异步流式接口（内部辅助函数）
+
+    Args:
+        early_abort: 翻译场景下启用；累计输出超过
+            _STREAM_ABORT_MIN_CHARS 仍几乎不含中文时中断生成，
+            截断的文本交给质量检查正常判罚后重试。
+            总结场景输出以英文要点开头，不能启用。
+
+    Returns:
+        str | None: 拼接后的输出文本，API 返回空结果时为 None
+    """
+    _ensure_litellm()
+    response = await _acompletion(
+        model=model,
+        api_key=api_key,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.3,
+        stream=True,
+    )
+
+    parts = []
+    length = 0
+    checked = not early_abort
+    async for chunk in response:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            continue
+        parts.append(delta)
+        length += len(delta)
+        if not checked and length >= _STREAM_ABORT_MIN_CHARS:
+            checked = True
+            text = ''.join(parts)
+            if _count_chinese_chars(text) / len(text) < _STREAM_ABORT_CJK_RATIO:
+                print(f"流式输出 {length} 字符仍几乎不含中文，提前中断本次生成")
+                break
+
+    if not parts:
+        return None
+    return ''.join(parts).strip()
+
+
+async def atranslate_changelog(
     content: str,
     model: str = None,
     api_key: str = None
 ) -> str:
     """
-    翻译更新日志内容
+    翻译更新日志内容（异步版本）
+
+    多个翻译任务可以用 asyncio.gather 并发执行，重叠网络等待时间。
 
     Args:
         content: 要翻译的英文内容
@@ -58,6 +257,14 @@ def translate_changelog(
     Returns:
         str: 翻译后的中文内容，失败时返回空字符串
     """
+    # 内容本身不需要翻译时直接返回，省下整次 LLM 调用
+    if not content:
+        return ""
+    reason = _skip_translation_reason(content)
+    if reason:
+        print(f"{reason}，跳过翻译")
+        return ""
+
     model = model or os.getenv("LLM_MODEL", "openrouter/google/gemini-2.5-flash")
     api_key = api_key or os.getenv("LLM_API_KEY", "")
 
@@ -65,51 +272,15 @@ def translate_changelog(
         print("翻译配置未设置，跳过翻译")
         return ""
 
-    prompt = f"""请将以下软件更新日志逐条翻译成中文，直接输出翻译结果。
-
-关键要求（必须严格遵守）：
-- 逐行翻译，禁止总结、合并或重新组织内容
-- 每个列表项（以 - 或 • 开头的行）必须单独翻译，不能合并成段落
-- 保持原文的结构和格式不变，翻译后的行数应与原文基本一致
-- 不要添加标题、摘要或任何原文没有的内容
-
-翻译示例（必须遵守）：
-- "• Added new feature" → "• 新增功能"
-- "• Fixed bug in API" → "• 修复 API 中的错误"
-- "• Changed default behavior" → "• 变更默认行为"
-- "• Removed deprecated option" → "• 移除已弃用的选项"
-- "- fix: resolve issue" → "- fix: 解决问题"（commit 前缀 fix/feat/chore 等保留英文）
-
-格式要求：
-1. 保持 Markdown 格式不变（标题、列表、代码块等）
-2. 版本号、行内代码保持原样
-3. 以下内容保留英文原文：
-   - GitHub 用户名：@xxx 格式保持不变
-   - 通用术语：API, SDK, CLI, Token, OAuth, WebSocket, Streaming, LLM, Prompt
-   - 功能名称：Agent, Subagent, Sub-agent, Skill, Hook, Plugin, Plan Mode, Compact Mode, Background Task, Memory, TUI, Sandbox, Transcript Mode
-   - 斜杠命令：/compact, /context, /permissions, /mcp, /model, /resume, /export, /stats, /init, /prompts, /approvals
-   - 工具与概念：MCP, Model Context Protocol, Tool Use, Tool Call, Bash Tool, Permission, Thinking Block, Frontmatter, exec_command, apply_patch, prompt cache, reasoning effort
-   - 配置文件：settings.json, CLAUDE.md, config.toml, AGENTS.md, .mcp.json
-4. 语言流畅自然，符合中文技术文档习惯
-5. 对于不确定的专有名词，保留英文
-
-待翻译内容：
-{content}"""
+    prompt = _TRANSLATE_PROMPT_PREFIX + content
 
     for attempt in range(MAX_RETRIES + 1):
         try:
-            response = completion(
-                model=model,
-                api_key=api_key,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-            )
-            if not response.choices or len(response.choices) == 0:
+            translated = await _acomplete(model, api_key, prompt, early_abort=True)
+            if translated is None:
                 print("翻译失败: API 返回空结果")
                 continue
 
-            translated = response.choices[0].message.content.strip()
-
             # 检查翻译质量
             if _check_translation_quality(translated):
                 chinese_count = _count_chinese_chars(translated)
@@ -123,6 +294,14 @@ def translate_changelog(
                 if attempt < MAX_RETRIES:
                     print(f"重试翻译 ({attempt + 2}/{MAX_RETRIES + 1})...")
 
+        except _BAD_REQUEST_ERROR as e:
+            print(f"翻译失败: 请求无效，不再重试: {e}")
+            return ""
+        except _RETRYABLE_ERRORS as e:
+            print(f"翻译失败: {e}")
+            if attempt < MAX_RETRIES:
+                print(f"重试翻译 ({attempt + 2}/{MAX_RETRIES + 1})...")
+                await _retry_backoff(attempt)
         except Exception as e:
             print(f"翻译失败: {e}")
             if attempt < MAX_RETRIES:
@@ -132,13 +311,121 @@ def translate_changelog(
     return ""
 
 
-def summarize_changelog(
+def translate_changelog(
+    content: str,
+    model: str = None,
+    api_key: str = None
+) -> str:
+    """
+    翻译更新日志内容（同步入口，转发到异步实现）
+
+    Args:
+        content: 要翻译的英文内容
+        model: 模型名称，默认使用环境变量 LLM_MODEL 或 openrouter/google/gemini-2.5-flash
+        api_key: API Key，默认使用环境变量 LLM_API_KEY
+
+    Returns:
+        str: 翻译后的中文内容，失败时返回空字符串
+    """
+    return asyncio.run(atranslate_changelog(content, model=model, api_key=api_key))
+
+
+async def atranslate_changelogs_batch(
+    contents: list[str],
+    model: str = None,
+    api_key: str = None
+) -> list[str]:
+    """
+    批量翻译多条更新日志（异步版本）
+
+    每个请求最多打包 BATCH_SIZE 条内容，用哨兵行分隔，共享同一份
+    翻译规则前导——相比逐条请求省掉 K-1 次网络往返和 K-1 份规则
+    token。解析失败或单条质量不合格时回退到逐条翻译。
+
+    Args:
+        contents: 要翻译的英文内容列表
+        model: 模型名称，默认使用环境变量 LLM_MODEL 或 openrouter/google/gemini-2.5-flash
+        api_key: API Key，默认使用环境变量 LLM_API_KEY
+
+    Returns:
+        list[str]: 与输入等长的翻译结果列表，失败的条目为空字符串
+    """
+    results = [""] * len(contents)
+    if not contents:
+        return results
+
+    model = model or os.getenv("LLM_MODEL", "openrouter/google/gemini-2.5-flash")
+    api_key = api_key or os.getenv("LLM_API_KEY", "")
+
+    if not api_key:
+        print("翻译配置未设置，跳过翻译")
+        return results
+
+    # 空内容和无需翻译的内容不占批次名额
+    pending = [
+        i for i, content in enumerate(contents)
+        if content and not _skip_translation_reason(content)
+    ]
+
+    for start in range(0, len(pending), BATCH_SIZE):
+        batch = pending[start:start + BATCH_SIZE]
+
+        items = "\n".join(
+            f"<<<ITEM {i}>>>\n{contents[i]}\n<<<END {i}>>>" for i in batch
+        )
+        prompt = _BATCH_PROMPT_PREFIX + items
+
+        parsed = {}
+        try:
+            response_text = await _acomplete(model, api_key, prompt, early_abort=True)
+            if response_text:
+                for match in _BATCH_ITEM_RE.finditer(response_text):
+                    parsed[int(match.group(1))] = match.group(2).strip()
+        except Exception as e:
+            print(f"批量翻译失败: {e}")
+
+        # 缺失或质量不合格的条目回退到逐条翻译
+        for i in batch:
+            translated = parsed.get(i, "")
+            if _check_translation_quality(translated):
+                results[i] = translated
+            else:
+                print(f"批量翻译第 {i + 1} 条结果缺失或不合格，回退逐条翻译")
+                results[i] = await atranslate_changelog(
+                    contents[i], model=model, api_key=api_key
+                )
+
+    return results
+
+
+def translate_changelogs_batch(
+    contents: list[str],
+    model: str = None,
+    api_key: str = None
+) -> list[str]:
+    """
+    批量翻译多条更新日志（同步入口，转发到异步实现）
+
+    Args:
+        contents: 要翻译的英文内容列表
+        model: 模型名称，默认使用环境变量 LLM_MODEL 或 openrouter/google/gemini-2.5-flash
+        api_key: API Key，默认使用环境变量 LLM_API_KEY
+
+    Returns:
+        list[str]: 与输入等长的翻译结果列表，失败的条目为空字符串
+    """
+    return asyncio.run(
+        atranslate_changelogs_batch(contents, model=model, api_key=api_key)
+    )
+
+
+async def asummarize_changelog(
     content: str,
     model: str = None,
     api_key: str = None
 ) -> str:
     """
-    生成简短的中英文更新要点总结，用于 Telegram 消息正文。
+    生成简短的中英文更新要点总结（异步版本），用于 Telegram 消息正文。
 
     Args:
         content: 英文更新内容
@@ -181,19 +468,32 @@ Release notes:
 {content}"""
 
     try:
-        response = completion(
-            model=model,
-            api_key=api_key,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-        )
-        if not response.choices or len(response.choices) == 0:
+        summary = await _acomplete(model, api_key, prompt)
+        if summary is None:
             print("总结生成失败: API 返回空结果")
             return ""
 
-        summary = response.choices[0].message.content.strip()
         print(f"更新要点总结生成完成 ({len(summary)} 字符)")
         return summary
     except Exception as e:
         print(f"总结生成失败: {e}")
         return ""
+
+
+def summarize_changelog(
+    content: str,
+    model: str = None,
+    api_key: str = None
+) -> str:
+    """
+    生成简短的中英文更新要点总结（同步入口，转发到异步实现）
+
+    Args:
+        content: 英文更新内容
+        model: 模型名称，默认使用环境变量 LLM_MODEL
+        api_key: API Key，默认使用环境变量 LLM_API_KEY
+
+    Returns:
+        str: 英文要点 + 空行 + 中文要点，失败时返回空字符串
+    """
+    return asyncio.run(asummarize_changelog(content, model=model, api_key=api_key))
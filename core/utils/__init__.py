@@ -2,5 +2,16 @@
 """工具函数模块"""
 
 from .clean import clean_release_body
+from .fileio import atomic_write_text, atomic_write_json
+from .http import make_session
+from .httpcache import conditional_get
+from .ratelimit import TokenBucket
 
-__all__ = ["clean_release_body"]
+__all__ = [
+    "clean_release_body",
+    "atomic_write_text",
+    "atomic_write_json",
+    "make_session",
+    "conditional_get",
+    "TokenBucket",
+]
@@ -5,12 +5,119 @@ Release body 清理工具函数
 """
 
 import re
+from functools import lru_cache
+
+# 所有清理用的正则在模块加载时编译一次，避免每次调用的缓存查找和标志解析
+
+# PR 列表标题及后面所有内容（合并原先的多个标题变体为一个交替模式）
+_PR_LIST_TITLE_RE = re.compile(
+    r'\n[-#]*\s*(?:Full list of merged PRs|Merged PRs|All merged PRs|List of merged PRs|PRs Merged).*'
+    r'|\n#+\s*PRs\s*\n.*',  # ### PRs 后跟换行
+    re.DOTALL | re.IGNORECASE
+)
+
+# "直接删除"的独立模式按原先的应用顺序分成三趟：
+# 1) 行级删除  2) 带 \s* 前缀的括号引用  3) 行内引用和链接
+# 行级删除可能暴露出新的 "空白 + (#n)" 组合，单遍最左优先的交替
+# 扫描越过该空白后无法回头吸收，会在成品里留下多余空行，所以括号
+# 引用必须作为独立的第二趟；它又必须先于行内 #n 引用执行，否则
+# (#6189) 会被先拆成 ()。各趟内部的分支互不重叠，可安全合并。
+# 已知与逐趟基线的差异：基线 "#xxx – 描述" 趟的 \s+ 会跨行，在前趟
+# 删掉中间行后可能把后面的真实列表行也吞掉；合并扫描不复刻这个
+# 行为，保留该行内容（差异方向只多不少）。
+# 字符类数量词在与后继 token 不重叠处用占有形式（++/*+），长行匹配失败
+# 时不做无谓的回退重试；分组重复保持贪婪（CPython 的 (?:...)*+ 会保留
+# 失败迭代吃掉的前缀，语义与原模式不同）
+_DELETE_LINE_RE = re.compile(
+    r'(?i:\*?\*?Full Changelog\*?\*?:?.*)'            # Full Changelog 行
+    r'|^[-*]\s+.*(?:by @|— @).*#\d++.*+$'             # PR 列表行（by @xxx in #xxx）
+    r'|^[-*]\s+.*\(#\d++\)\s*+—\s*+@.*+$'             # PR 列表行（(#xxx) — @xxx）
+    r'|^#\d++\s++[–—-]\s++.*+$'                       # #xxx – 描述 行
+    r'|^[-*]\s++PR\s*$',                              # 单独的 "- PR" 行
+    re.MULTILINE
+)
+_DELETE_REF_RE = re.compile(
+    r'(?i:\s*+\(PR\s*+#?\d*+\))'                      # (PR #xxxx) 引用
+    r'|\s*+\(#\d++(?:\s++#\d++)*\)',                  # (#6189) 引用
+    re.MULTILINE
+)
+_DELETE_INLINE_RE = re.compile(
+    r'#\d++(?:\s++#\d++)*'                            # 内联 #6222 引用
+    r'|https://github\.com/openai/codex/(?:pull|issues)/\d++',  # PR/Issue 链接
+    re.MULTILINE
+)
+
+# 残留引用文本的修补：这些改写之间存在顺序依赖（如行尾的 fixing
+# 清理必须先于 reverted…fixing 的改写执行，否则后者会抢先消费文本
+# 得出不同结果），必须按列表顺序逐趟整串应用，不能合并成一次最左
+# 优先的交替扫描；每个模式配一个小写触发词，正文不含触发词时跳过
+# 该趟扫描
+_RESIDUAL_PASSES = [
+    (trigger, re.compile(pattern, re.MULTILINE), repl)
+    for trigger, pattern, repl in [
+        ('see', r'See\s+for details\.?', ''),
+        ('as of', r'As of\s*,\s*', ''),
+        (' in', r'\s+in\s+so\s+', ' so '),
+        (' in', r'\s+in\s*,', ','),
+        (' in', r'\s+in\s*\)', ')'),
+        (' in', r'\s+in\s+because', ' because'),
+        (' in', r'\s+in\s*$', ''),
+        ('thanks', r'(?i:thanks to)\s*$', ''),
+        ('fixing', r'fixing\s*\.?\s*$', ''),
+        ('(was', r'\s*\(was the relevant GitHub issue\)\s*', ' '),
+        ('gracefully', r'gracefully\s+- ', 'gracefully\n- '),
+        ('though', r'though from the additional details on\s*,', 'though'),
+        ('though', r'Though\s+should', 'Though it should'),
+        ('reverted', r'reverted\s*,\s*fixing', 'reverted the previous change, fixing'),
+    ]
+]
+
+
+# 行首空引用（- 和 * 两种列表符号合并为一个分组）
+_EMPTY_BULLET_RE = re.compile(r'^([-*])\s+\s+', re.MULTILINE)
+
+# GitHub @用户名（用户名部分占有匹配，后面没有会与之重叠的 token）
+_USERNAME_RE = re.compile(r'@(\w[\w-]*+)')
+
+# 多余空白和标点（\s 与后继的 ) : 不重叠，可安全用占有形式；
+# 行尾的 \s*$ 不能占有——\s 会吃掉换行导致 MULTILINE $ 匹配失败）
+_TRAILING_COLON_RE = re.compile(r'\s*:\s*\.?\s*$', re.MULTILINE)
+_SPACE_BEFORE_PAREN_RE = re.compile(r'\s++\)')
+_SPACE_AFTER_PAREN_RE = re.compile(r'\(\s++')
+_EMPTY_PAREN_RE = re.compile(r'\([\s,]*\)')  # 空括号和仅含逗号的括号如 (,) (, , ,)
+_SPACE_BEFORE_COLON_RE = re.compile(r'\s++:')
+_TRAILING_COMMA_RE = re.compile(r',\s*$', re.MULTILINE)
+_MULTI_SPACE_RE = re.compile(r'[^\S\n]{2,}+')
+_MULTI_DOT_RE = re.compile(r'\.{2,}+')
+_LONE_DOT_LINE_RE = re.compile(r'^\s*\.\s*$', re.MULTILINE)
+_STAR_LIST_RE = re.compile(r'^[*]\s+', re.MULTILINE)
+_BLANK_BETWEEN_ITEMS_RE = re.compile(r'\n\n+(?=- )')
+
+# 常见标题关键词加粗（匹配行首的关键词，可能带冒号）
+# 每个模式配一个小写触发词，正文不含触发词时跳过该模式的扫描
+_TITLE_KEYWORD_RES = [
+    (trigger, re.compile(rf'^({keyword})(\s*:?\s*)$', re.MULTILINE | re.IGNORECASE))
+    for trigger, keyword in [
+        ('highlight', 'Highlights?'),
+        ("what", 'What\'?s New'),
+        ('breaking', 'Breaking Changes?'),
+        ('feature', 'New Features?'),
+        ('fix', 'Bug Fixes?'),
+        ('improvement', 'Improvements?'),
+        ('change', 'Changes?'),
+        ('note', 'Notes?'),
+    ]
+]
 
 
+@lru_cache(maxsize=1024)
 def clean_release_body(body: str) -> str:
     """
     清理 release body 内容
 
+    纯函数，结果按输入缓存；同一进程内重复清理相同正文
+    （如检查器对同一版本的多次处理）直接命中缓存
+
     移除：
     - PR 列表标题及后续内容
     - Full Changelog 行
@@ -33,102 +140,64 @@ def clean_release_body(body: str) -> str:
 
     clean = body
 
+    # 先用廉价的子串检查做门控：不含相关标记的正文直接跳过对应的
+    # 正则扫描（子串查找是 C 层实现，比空跑一遍正则引擎便宜得多）
+    lowered = clean.lower()
+
     # 移除各种 PR 列表标题及后面所有内容
-    pr_title_patterns = [
-        r'\n[-#]*\s*Full list of merged PRs.*',
-        r'\n[-#]*\s*Merged PRs.*',
-        r'\n[-#]*\s*All merged PRs.*',
-        r'\n[-#]*\s*List of merged PRs.*',
-        r'\n[-#]*\s*PRs Merged.*',
-        r'\n#+\s*PRs\s*\n.*',  # ### PRs 后跟换行
-    ]
-    for pattern in pr_title_patterns:
-        clean = re.sub(pattern, '', clean, flags=re.DOTALL | re.IGNORECASE)
-
-    # 移除 Full Changelog 行
-    clean = re.sub(r'\*?\*?Full Changelog\*?\*?:?.*', '', clean, flags=re.IGNORECASE)
-
-    # 移除 PR 列表行（各种格式）
-    clean = re.sub(r'^[-*]\s+.*(?:by @|— @).*(?:in #\d+|#\d+).*$', '', clean, flags=re.MULTILINE)
-    clean = re.sub(r'^[-*]\s+.*\(#\d+\)\s*—\s*@.*$', '', clean, flags=re.MULTILINE)
-    clean = re.sub(r'^#\d+\s+[–—-]\s+.*$', '', clean, flags=re.MULTILINE)
-    clean = re.sub(r'^[-*]\s+PR\s*$', '', clean, flags=re.MULTILINE)  # 单独的 "- PR" 行
-
-    # 移除 (PR #xxxx) 格式的引用
-    clean = re.sub(r'\s*\(PR\s*#?\d*\)', '', clean, flags=re.IGNORECASE)
-
-    # 移除内联的 PR/Issue 引用（如 #6222, (#6189)）
-    clean = re.sub(r'\s*\(#\d+(?:\s+#\d+)*\)', '', clean)
-    clean = re.sub(r'#\d+(?:\s+#\d+)*', '', clean)
-
-    # 移除 PR/Issue 链接
-    clean = re.sub(r'https://github\.com/openai/codex/pull/\d+', '', clean)
-    clean = re.sub(r'https://github\.com/openai/codex/issues/\d+', '', clean)
-
-    # 清理残留的引用文本
-    clean = re.sub(r'See\s+for details\.?', '', clean)
-    clean = re.sub(r'As of\s*,\s*', '', clean)
-    clean = re.sub(r'\s+in\s+so\s+', ' so ', clean)
-    clean = re.sub(r'\s+in\s*,', ',', clean)
-    clean = re.sub(r'\s+in\s*\)', ')', clean)
-    clean = re.sub(r'\s+in\s+because', ' because', clean)
-    clean = re.sub(r'\s+in\s*$', '', clean, flags=re.MULTILINE)
-    clean = re.sub(r'thanks to\s*$', '', clean, flags=re.MULTILINE | re.IGNORECASE)
-    clean = re.sub(r'fixing\s*\.?\s*$', '', clean, flags=re.MULTILINE)
-    clean = re.sub(r'\s*\(was the relevant GitHub issue\)\s*', ' ', clean)
-    clean = re.sub(r'gracefully\s+- ', 'gracefully\n- ', clean)
-    clean = re.sub(r'though from the additional details on\s*,', 'though', clean)
-    clean = re.sub(r'Though\s+should', 'Though it should', clean)
-    clean = re.sub(r'reverted\s*,\s*fixing', 'reverted the previous change, fixing', clean)
+    if 'pr' in lowered:
+        clean = _PR_LIST_TITLE_RE.sub('', clean)
+
+    # 移除 Full Changelog 行、PR 列表行、括号/内联 PR-Issue 引用和链接
+    # （三趟的顺序见模式定义处的说明；所有分支都至少需要下列标记之一）
+    if ('#' in clean or '@' in clean or 'github.com' in clean
+            or 'pr' in lowered or 'full changelog' in lowered):
+        clean = _DELETE_LINE_RE.sub('', clean)
+        clean = _DELETE_REF_RE.sub('', clean)
+        clean = _DELETE_INLINE_RE.sub('', clean)
+
+    # 清理残留的引用文本（按固定顺序逐趟应用，见模式定义处的说明；
+    # 前面的步骤只做删除，原文的小写副本仍可用于触发词判断）
+    for trigger, pattern, repl in _RESIDUAL_PASSES:
+        if trigger in lowered:
+            clean = pattern.sub(repl, clean)
 
     # 清理行首的空引用
-    clean = re.sub(r'^-\s+\s+', '- ', clean, flags=re.MULTILINE)
-    clean = re.sub(r'^\*\s+\s+', '* ', clean, flags=re.MULTILINE)
+    clean = _EMPTY_BULLET_RE.sub(r'\1 ', clean)
 
     # 将 GitHub @用户名 转换为超链接
-    clean = re.sub(r'@(\w[\w-]*)', r'[@\1](https://github.com/\1)', clean)
+    if '@' in clean:
+        clean = _USERNAME_RE.sub(r'[@\1](https://github.com/\1)', clean)
 
     # 清理多余空白和标点
-    clean = re.sub(r'\s*:\s*\.?\s*$', '', clean, flags=re.MULTILINE)
-    clean = re.sub(r'\s+\)', ')', clean)
-    clean = re.sub(r'\(\s+', '(', clean)
-    clean = re.sub(r'\([\s,]*\)', '', clean)  # 移除空括号和仅含逗号的括号如 (,) (, , ,)
-    clean = re.sub(r'\s+:', ':', clean)  # 移除冒号前的多余空格
-    clean = re.sub(r',\s*$', '', clean, flags=re.MULTILINE)
-    clean = re.sub(r'[^\S\n]{2,}', ' ', clean)
-    clean = re.sub(r'\n{3,}', '\n\n', clean)
+    clean = _TRAILING_COLON_RE.sub('', clean)
+    clean = _SPACE_BEFORE_PAREN_RE.sub(')', clean)
+    clean = _SPACE_AFTER_PAREN_RE.sub('(', clean)
+    clean = _EMPTY_PAREN_RE.sub('', clean)
+    clean = _SPACE_BEFORE_COLON_RE.sub(':', clean)
+    clean = _TRAILING_COMMA_RE.sub('', clean)
+    clean = _MULTI_SPACE_RE.sub(' ', clean)
+    # 连续空行压成一个：固定模式用 C 层的 str.replace 循环比正则快
+    while '\n\n\n' in clean:
+        clean = clean.replace('\n\n\n', '\n\n')
 
     # 清理句末多余的点（如 "sigstore.." → "sigstore."）
-    clean = re.sub(r'\.{2,}', '.', clean)
+    clean = _MULTI_DOT_RE.sub('.', clean)
 
     # 清理独立的点（单独一行只有点的情况）
-    clean = re.sub(r'^\s*\.\s*$', '', clean, flags=re.MULTILINE)
+    clean = _LONE_DOT_LINE_RE.sub('', clean)
 
     # 统一列表符号为 -（兼容 Windows GBK 终端）
-    clean = re.sub(r'^[*]\s+', '- ', clean, flags=re.MULTILINE)
+    clean = _STAR_LIST_RE.sub('- ', clean)
 
     # 删除列表项之间的空行
-    clean = re.sub(r'\n\n+(?=- )', '\n', clean)
+    clean = _BLANK_BETWEEN_ITEMS_RE.sub('\n', clean)
 
     # 将常见的标题关键词加粗并添加空行（提升阅读体验）
-    # 匹配行首的标题词，加粗并在后面添加空行
-    title_keywords = [
-        'Highlights?',
-        'What\'?s New',
-        'Breaking Changes?',
-        'New Features?',
-        'Bug Fixes?',
-        'Improvements?',
-        'Changes?',
-        'Notes?',
-    ]
-    for keyword in title_keywords:
-        # 匹配行首的关键词（可能带冒号），加粗并在后面添加空行
-        clean = re.sub(
-            rf'^({keyword})(\s*:?\s*)$',
-            r'**\1**\n',
-            clean,
-            flags=re.MULTILINE | re.IGNORECASE
-        )
+    # 此时正文已多轮改写，重新取小写副本做触发词判断
+    lowered = clean.lower()
+    for trigger, pattern in _TITLE_KEYWORD_RES:
+        if trigger in lowered:
+            clean = pattern.sub(r'**\1**\n', clean)
 
     return clean.strip()
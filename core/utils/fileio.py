@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+原子文件写入工具
+先写临时文件再 os.replace 替换，进程在写入途中崩溃也不会
+留下半截内容的状态文件
+"""
+
+import json
+import os
+
+# 已确认存在的父目录集合：同一目录的重复写入跳过 makedirs
+# 的 stat 系统调用（output 目录在进程生命周期内不会被删除）
+_ensured_dirs = set()
+
+
+def _ensure_parent(path):
+    """确保父目录存在（每个目录每进程只做一次）"""
+    parent = os.path.dirname(path)
+    if parent not in _ensured_dirs:
+        os.makedirs(parent, exist_ok=True)
+        _ensured_dirs.add(parent)
+
+
+def atomic_write_text(path, text):
+    """原子写入文本文件（自动创建父目录）"""
+    _ensure_parent(path)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        # 落盘后再替换：避免断电时 rename 先持久化而数据还在页缓存里
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def atomic_write_json(path, data, indent=None):
+    """原子写入 JSON 文件（自动创建父目录）"""
+    _ensure_parent(path)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
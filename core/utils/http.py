@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP Session 工具
+构造带自动重试的 requests.Session：瞬时的 5xx/连接错误在 urllib3 层
+指数退避重试，不再直接冒泡成"本轮检查失败"
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def make_session(total_retries=5, backoff_factor=0.5):
+    """
+    创建带重试的 Session
+
+    只对幂等的 GET 重试常见瞬时状态码；raise_on_status=False 保证
+    重试耗尽后返回最后一个响应，调用方的状态码分支逻辑不受影响。
+
+    Args:
+        total_retries: 最大重试次数
+        backoff_factor: 指数退避系数（0.5 → 0.5s, 1s, 2s, ...）
+
+    Returns:
+        配置好重试适配器的 requests.Session
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=total_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods={"GET"},
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP 条件请求缓存
+按 URL 持久化 ETag/Last-Modified 和响应体到 output/http_cache.json，
+下次请求自动带上 If-None-Match/If-Modified-Since。GitHub 对条件请求
+返回 304 时不计入速率限制，响应体直接从缓存取，省去重复下载
+"""
+
+import json
+import os
+
+import requests
+
+from .fileio import atomic_write_json
+
+# 缓存结构变化时递增，旧缓存整体作废重建
+_CACHE_SCHEMA = 1
+
+_CACHE_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "output", "http_cache.json")
+
+# 进程内只加载一次缓存文件，后续命中不再碰磁盘
+_cache = None
+
+
+def _load_cache():
+    """懒加载缓存文件（schema 不匹配或损坏时从空缓存重建）"""
+    global _cache
+    if _cache is None:
+        _cache = {"schema": _CACHE_SCHEMA, "entries": {}}
+        try:
+            if os.path.exists(_CACHE_FILE):
+                with open(_CACHE_FILE, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get("schema") == _CACHE_SCHEMA:
+                    _cache = data
+        except Exception as e:
+            print(f"读取 HTTP 缓存失败: {e}")
+    return _cache
+
+
+def conditional_get(url, headers=None, timeout=10, session=None):
+    """
+    发起条件 GET 请求
+
+    缓存里有该 URL 的验证器时自动追加 If-None-Match/If-Modified-Since；
+    服务端返回 304 时直接用缓存的响应体，对调用方表现为 200。
+
+    Args:
+        url: 请求地址
+        headers: 额外请求头（验证头在此基础上追加）
+        timeout: 超时秒数
+        session: 可选的 requests.Session（复用连接池）
+
+    Returns:
+        (status_code, body) 元组；网络错误时抛出 requests.RequestException，
+        与直接调用 requests.get 的约定一致
+    """
+    cache = _load_cache()
+    entry = cache["entries"].get(url)
+
+    request_headers = dict(headers) if headers else {}
+    if entry:
+        if entry.get("etag"):
+            request_headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            request_headers["If-Modified-Since"] = entry["last_modified"]
+
+    getter = session.get if session is not None else requests.get
+    resp = getter(url, headers=request_headers, timeout=timeout)
+
+    if resp.status_code == 304 and entry:
+        return 200, entry.get("body", "")
+
+    if resp.status_code == 200:
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        # 只缓存带验证器的响应，没有验证器时下次也发不出条件请求
+        if etag or last_modified:
+            cache["entries"][url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "body": resp.text,
+            }
+            try:
+                atomic_write_json(_CACHE_FILE, cache)
+            except Exception as e:
+                print(f"保存 HTTP 缓存失败: {e}")
+
+    return resp.status_code, resp.text
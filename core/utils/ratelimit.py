@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+令牌桶限速器
+用于 Telegram 推送节流：突发时允许连续发送，只有桶空时才真正等待，
+替代固定 time.sleep 间隔
+"""
+
+import time
+
+
+class TokenBucket:
+    """
+    令牌桶
+
+    按 rate（令牌/秒）匀速补充令牌，最多积攒 burst 个。
+    acquire() 取走一个令牌，桶空时阻塞到下一个令牌生成。
+
+    Args:
+        rate: 每秒生成的令牌数
+        burst: 桶容量（允许的突发数量）
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        """按流逝时间补充令牌"""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """取走一个令牌，必要时阻塞等待"""
+        self._refill()
+        if self._tokens < 1:
+            wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            self._refill()
+        self._tokens -= 1
+
+    def penalize(self, seconds):
+        """
+        服务端限流（如 Telegram 429 retry_after）时调用：
+        等待指定秒数并清空桶，之后从零开始积攒令牌
+        """
+        if seconds > 0:
+            time.sleep(seconds)
+        self._tokens = 0.0
+        self._updated = time.monotonic()
@@ -8,6 +8,7 @@
 import subprocess
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -24,33 +25,35 @@ CHECKERS = [
 
 
 def run_checker(checker):
-    """运行单个版本检查脚本"""
-    print(f"\n{'=' * 50}")
-    print(f"检查 {checker['name']} 版本更新")
-    print("=" * 50)
+    """
+    运行单个版本检查脚本，逐行实时转发输出
 
+    子进程输出不再整体缓冲，而是每来一行就带 [名称] 前缀打印，
+    长时间运行的脚本也能即时看到进展；并发运行时靠前缀区分
+    各检查器的日志
+    """
+    prefix = f"[{checker['name']}]"
     try:
         # 设置子进程使用 UTF-8 编码
         env = os.environ.copy()
         env['PYTHONIOENCODING'] = 'utf-8'
-        result = subprocess.run(
+        process = subprocess.Popen(
             [sys.executable, checker["script"]],
-            capture_output=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
             text=True,
             encoding='utf-8',
+            bufsize=1,
             env=env,
         )
-        # 输出子进程的标准输出
-        if result.stdout:
-            print(result.stdout, end='')
-        # 输出子进程的错误信息
-        if result.stderr:
-            print(result.stderr, end='')
-        if result.returncode != 0:
-            print(f"脚本退出码: {result.returncode}")
-        return result.returncode == 0
+        for line in process.stdout:
+            print(f"{prefix} {line}", end='', flush=True)
+        returncode = process.wait()
+        if returncode != 0:
+            print(f"{prefix} 脚本退出码: {returncode}")
+        return returncode == 0
     except (subprocess.SubprocessError, OSError) as e:
-        print(f"运行 {checker['name']} 检查脚本失败: {e}")
+        print(f"{prefix} 运行检查脚本失败: {e}")
         return False
 
 
@@ -58,10 +61,11 @@ def main():
     print("版本更新监控工具")
     print("=" * 50)
 
-    success_count = 0
-    for checker in CHECKERS:
-        if run_checker(checker):
-            success_count += 1
+    # 各检查脚本大部分时间在等网络，并发运行让总耗时接近最慢的
+    # 一个而不是所有脚本之和；日志实时打印，靠行首前缀区分来源
+    with ThreadPoolExecutor(max_workers=len(CHECKERS)) as executor:
+        futures = [executor.submit(run_checker, checker) for checker in CHECKERS]
+        success_count = sum(1 for future in futures if future.result())
 
     print(f"\n{'=' * 50}")
     print(f"检查完成: {success_count}/{len(CHECKERS)} 个工具检查成功")
@@ -6,8 +6,6 @@ Claude Code 版本更新检查脚本
 """
 
 import argparse
-import hashlib
-import json
 import os
 import re
 import sys
@@ -19,8 +17,11 @@ load_dotenv()
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from core.notify.telegram import edit_bilingual_notification, send_bilingual_notification
-from core.translate import translate_changelog
+from core.utils import make_session
+from core.state import TrackerState, compute_body_hash
+
+# core.translate 会引入 litellm 等重量级依赖，延迟到真正需要发通知的分支再导入，
+# 让"无新版本 / 304"的快速路径省掉这部分冷启动时间
 
 # 配置
 CHANGELOG_URL = "https://raw.githubusercontent.com/anthropics/claude-code/refs/heads/main/CHANGELOG.md"
@@ -28,27 +29,95 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(os.path.dirname(SCRIPT_DIR))
 VERSION_FILE = os.path.join(PROJECT_ROOT, "output", "claude_code_latest_version.txt")
 MESSAGE_STATE_FILE = os.path.join(PROJECT_ROOT, "output", "claude_code_message_state.json")
+ETAG_FILE = os.path.join(PROJECT_ROOT, "output", "claude_code_changelog.etag")
 
 # Telegram 配置（独立环境变量）
 TELEGRAM_BOT_TOKEN = os.getenv("CLAUDE_CODE_BOT_TOKEN", "")
 TELEGRAM_CHAT_ID = os.getenv("CLAUDE_CODE_CHAT_ID", "")
 
+# 复用同一个 Session，利用连接池；带重试适配器，瞬时 5xx/连接错误自动退避重试
+_SESSION = make_session()
+
+# 本地状态（版本记录、ETag、消息状态）的读写统一走共享实现
+_STATE = TrackerState(VERSION_FILE, MESSAGE_STATE_FILE, ETAG_FILE)
+
+
+# 本轮请求拿到的新 ETag：检查全程成功后才由 main 持久化。
+# 提前落盘的话，流式读取中断或后续推送失败后，下轮 cron 会拿到
+# 304 走早退路径，把一次瞬时失败固化成通知永久丢失
+_pending_etag = None
+
+
+def fetch_changelog(use_etag=True, full=False):
+    """
+    从 GitHub 获取 CHANGELOG.md 内容
+
+    通过 If-None-Match 条件请求实现增量拉取：内容未变化时 GitHub 返回 304，
+    省去整个 CHANGELOG 的下载。默认以流式方式读取，看到第二个版本标题
+    （即最新版本段结束）就中断传输——解析只需要文件顶部的几 KB。
+
+    Args:
+        use_etag: 是否发送本地缓存的 ETag（强制模式等必须拿到内容时传 False）
+        full: 是否下载完整 CHANGELOG（如 --force -V 需要查找历史版本）
+
+    Returns:
+        (text, not_modified) 元组；not_modified 为 True 表示远程内容未变化
+    """
+    global _pending_etag
+
+    headers = {}
+    if use_etag:
+        etag = _STATE.read_etag()
+        if etag:
+            headers["If-None-Match"] = etag
 
-def fetch_changelog():
-    """从 GitHub 获取 CHANGELOG.md 内容"""
     try:
-        response = requests.get(CHANGELOG_URL, timeout=10)
+        response = _SESSION.get(CHANGELOG_URL, headers=headers, timeout=10,
+                                stream=not full)
+        if response.status_code == 304:
+            return None, True
         response.raise_for_status()
-        return response.text
+        _pending_etag = response.headers.get("ETag")
+
+        if full:
+            return response.text, False
+
+        if response.encoding is None:
+            response.encoding = 'utf-8'
+
+        # 流式读取，统计 "\n## " 版本边界；凑够两个（最新版本段已完整）即中断
+        chunks = []
+        boundary_count = 0
+        tail = ''
+        for chunk in response.iter_content(chunk_size=8192, decode_unicode=True):
+            chunks.append(chunk)
+            # tail 只保留 3 个字符，短于边界标记，跨块的边界不会被重复统计
+            boundary_count += (tail + chunk).count('\n## ')
+            tail = chunk[-3:]
+            if boundary_count >= 2:
+                response.close()
+                break
+
+        return ''.join(chunks), False
     except requests.RequestException as e:
         print(f"获取更新日志失败: {e}")
-        return None
+        return None, False
+
+
+# 版本标题行（如 "## 2.1.49"）
+_VERSION_HEADING_RE = re.compile(r'^## (\d+\.\d+\.\d+)', re.MULTILINE)
+
+# --target-version 参数的版本号格式
+_VERSION_ARG_RE = re.compile(r'\d+\.\d+\.\d+')
 
 
 def _parse_version_content(changelog_text, target_version=None):
     """
     解析 CHANGELOG 中指定版本的内容
 
+    直接在原字符串上定位版本标题，切片到下一个版本标题为止，
+    不做逐行拆分和重新拼接（finditer 是惰性的，找到目标即停）。
+
     Args:
         changelog_text: CHANGELOG 全文
         target_version: 目标版本号，None 时解析最新版本
@@ -56,30 +125,21 @@ def _parse_version_content(changelog_text, target_version=None):
     Returns:
         (version, content) 元组；未找到时返回 (None, None)
     """
-    version_pattern = r'^## (\d+\.\d+\.\d+)'
-    lines = changelog_text.split('\n')
-    found_version = None
-    content_lines = []
-
-    for line in lines:
-        match = re.match(version_pattern, line)
-        if match:
-            if found_version is not None:
+    if target_version is None:
+        match = _VERSION_HEADING_RE.search(changelog_text)
+    else:
+        match = None
+        for m in _VERSION_HEADING_RE.finditer(changelog_text):
+            if m.group(1) == target_version:
+                match = m
                 break
-            current = match.group(1)
-            if target_version is None or current == target_version:
-                found_version = current
-                content_lines.append(line)
-        elif found_version is not None:
-            content_lines.append(line)
-
-    if found_version is None:
-        return None, None
 
-    while content_lines and not content_lines[-1].strip():
-        content_lines.pop()
+    if match is None:
+        return None, None
 
-    return found_version, '\n'.join(content_lines)
+    next_match = _VERSION_HEADING_RE.search(changelog_text, match.end())
+    end = next_match.start() if next_match else len(changelog_text)
+    return match.group(1), changelog_text[match.start():end].rstrip()
 
 
 def parse_latest_version(changelog_text):
@@ -87,98 +147,30 @@ def parse_latest_version(changelog_text):
     return _parse_version_content(changelog_text)
 
 
-def parse_specific_version(changelog_text, target_version):
-    """解析指定版本号的更新内容"""
-    _, content = _parse_version_content(changelog_text, target_version)
-    return content
-
-
-def read_saved_version():
-    """读取本地保存的版本号"""
-    if not os.path.exists(VERSION_FILE):
-        return None
-
-    try:
-        with open(VERSION_FILE, 'r', encoding='utf-8') as f:
-            return f.read().strip()
-    except Exception as e:
-        print(f"读取本地版本文件失败: {e}")
-        return None
-
-
-def save_version(version):
-    """保存版本号到本地文件"""
-    try:
-        os.makedirs(os.path.dirname(VERSION_FILE), exist_ok=True)
-        with open(VERSION_FILE, 'w', encoding='utf-8') as f:
-            f.write(version)
-        return True
-    except Exception as e:
-        print(f"保存版本信息失败: {e}")
-        return False
-
-
-def compute_body_hash(body):
-    """计算 body 内容的 hash 值"""
-    if not body:
-        return ""
-    return hashlib.md5(body.encode('utf-8')).hexdigest()
-
-
-def read_message_state():
+def _index_versions(changelog_text):
     """
-    读取消息状态文件
+    一趟扫描建立 版本号 -> 内容 的索引
+
+    -f -V 路径会在同一份全文上同时查最新版本和目标版本，
+    建一次索引后两边都是 O(1) 字典取值，免去第二趟正则扫描。
 
     Returns:
-        dict: {"version": str, "message_ids": list, "body_hash": str} 或 None
+        (versions, latest) 元组；versions 为 dict，latest 为最新版本号，
+        无版本标题时为 ({}, None)
     """
-    if not os.path.exists(MESSAGE_STATE_FILE):
-        return None
+    matches = list(_VERSION_HEADING_RE.finditer(changelog_text))
+    versions = {}
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(changelog_text)
+        versions[match.group(1)] = changelog_text[match.start():end].rstrip()
+    latest = matches[0].group(1) if matches else None
+    return versions, latest
+
+
 
-    try:
-        with open(MESSAGE_STATE_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"读取消息状态文件失败: {e}")
-        return None
 
 
-def save_message_state(version, message_ids, body_hash):
-    """
-    保存消息状态到文件
 
-    Args:
-        version: 版本号
-        message_ids: Telegram 消息 ID 列表
-        body_hash: body 内容的 hash 值
-    """
-    try:
-        os.makedirs(os.path.dirname(MESSAGE_STATE_FILE), exist_ok=True)
-        state = {
-            "version": version,
-            "message_ids": message_ids,
-            "body_hash": body_hash
-        }
-        with open(MESSAGE_STATE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(state, f, ensure_ascii=False, indent=2)
-        return True
-    except Exception as e:
-        print(f"保存消息状态失败: {e}")
-        return False
-
-
-def clear_message_state():
-    """
-    清理消息状态文件（用于消息已删除等无法恢复的情况）
-    """
-    try:
-        if os.path.exists(MESSAGE_STATE_FILE):
-            os.remove(MESSAGE_STATE_FILE)
-            print("消息状态已清理")
-        return True
-    except Exception as e:
-        print(f"清理消息状态失败: {e}")
-        return False
 
 
 def main():
@@ -193,20 +185,48 @@ def main():
         print("错误: --target-version 需配合 --force 使用")
         return 1
 
-    if args.target_version is not None and not re.fullmatch(r'\d+\.\d+\.\d+', args.target_version):
+    if args.target_version is not None and not _VERSION_ARG_RE.fullmatch(args.target_version):
         print(f"错误: 版本号格式不正确 '{args.target_version}'，期望格式如 2.1.49")
         return 1
 
+    exit_code = _run_check(args)
+
+    # 检查全程成功才持久化新 ETag；失败时保留旧值，下轮重新拉取
+    # 完整 CHANGELOG 重试。强制模式不更新任何本地记录，ETag 同样不动
+    if exit_code == 0 and not args.force:
+        _STATE.save_etag(_pending_etag)
+    return exit_code
+
+
+def _run_check(args):
+    """执行一轮完整检查，返回进程退出码（ETag 持久化由 main 统一处理）"""
     print("正在检查 Claude Code 更新...")
     print("-" * 50)
 
-    # 获取最新的 CHANGELOG
-    changelog = fetch_changelog()
+    # 获取最新的 CHANGELOG（强制模式必须拿到内容，跳过 ETag；
+    # 指定历史版本时需要完整文件，其余场景只需顶部的最新版本段）
+    changelog, not_modified = fetch_changelog(
+        use_etag=not args.force,
+        full=args.target_version is not None
+    )
+    if not_modified:
+        # 首次运行时本地没有版本记录，即使 304 也需要完整内容
+        if _STATE.read_version() is None:
+            changelog, _ = fetch_changelog(use_etag=False)
+        else:
+            print("CHANGELOG 未变化（304），无需检查")
+            return 0
     if not changelog:
         return 1
 
-    # 解析最新版本
-    latest_version, latest_content = parse_latest_version(changelog)
+    # 解析最新版本（-f -V 时已拿到完整文件，一趟建索引供两处取用；
+    # 常规路径只有最新版本段，惰性解析到第一个标题即可）
+    versions_index = None
+    if args.target_version is not None:
+        versions_index, latest_version = _index_versions(changelog)
+        latest_content = versions_index.get(latest_version, None)
+    else:
+        latest_version, latest_content = parse_latest_version(changelog)
     if not latest_version:
         print("无法解析版本信息")
         return 1
@@ -218,7 +238,7 @@ def main():
         # 确定推送的版本和内容
         if args.target_version is not None:
             push_version = args.target_version
-            push_content = parse_specific_version(changelog, push_version)
+            push_content = versions_index.get(push_version)
             if push_content is None:
                 print(f"错误: 未在 CHANGELOG 中找到版本 {push_version}")
                 return 1
@@ -236,8 +256,12 @@ def main():
             print("(内容包含特殊字符，已跳过终端显示)")
         print("-" * 50)
 
-        # 发送 Telegram 通知
-        translated = translate_changelog(push_content)
+        # 发送 Telegram 通知（翻译走磁盘缓存：同一正文重跑时不再请求 LLM）
+        from core.notify.telegram import send_bilingual_notification
+        from core.translate import cached_translate, flush_translation_cache
+
+        translated = cached_translate(push_content)
+        flush_translation_cache()
         notify_result = send_bilingual_notification(
             version=push_version,
             original=push_content,
@@ -255,12 +279,12 @@ def main():
         return 0
 
     # 读取本地保存的版本
-    saved_version = read_saved_version()
+    saved_version = _STATE.read_version()
 
     if saved_version is None:
         # 首次运行
         print(f"首次运行，已记录版本 {latest_version}")
-        save_version(latest_version)
+        _STATE.save_version(latest_version)
         return 0
     elif saved_version == latest_version:
         # 版本相同，检查内容是否有更新
@@ -269,7 +293,7 @@ def main():
 
         # 检查 body 是否有变化（用于处理开发者延迟修改 CHANGELOG 的情况）
         current_body_hash = compute_body_hash(latest_content)
-        message_state = read_message_state()
+        message_state = _STATE.read_message_state()
 
         if message_state and message_state.get("version") == latest_version:
             saved_body_hash = message_state.get("body_hash", "")
@@ -279,7 +303,11 @@ def main():
                 print("-" * 50)
                 print("检测到 CHANGELOG 已更新，正在编辑之前发送的通知...")
 
-                translated = translate_changelog(latest_content)
+                from core.notify.telegram import edit_bilingual_notification
+                from core.translate import cached_translate, flush_translation_cache
+
+                translated = cached_translate(latest_content)
+                flush_translation_cache()
 
                 edit_result = edit_bilingual_notification(
                     message_ids=saved_message_ids,
@@ -293,11 +321,11 @@ def main():
 
                 if edit_result["success"]:
                     print("消息编辑成功")
-                    if not save_message_state(latest_version, edit_result["message_ids"], current_body_hash):
+                    if not _STATE.save_message_state(latest_version, edit_result["message_ids"], current_body_hash):
                         print("⚠️ 消息状态保存失败（不影响主流程）")
                 else:
                     print("⚠️  消息编辑失败，可能消息已被删除")
-                    clear_message_state()
+                    _STATE.clear_message_state()
                     return 1
 
         return 0
@@ -311,13 +339,17 @@ def main():
         except UnicodeEncodeError:
             print("(内容包含特殊字符，已跳过终端显示)")
         print("-" * 50)
-        if not save_version(latest_version):
+        if not _STATE.save_version(latest_version):
             print("⚠️ 版本记录保存失败，停止推送以避免重复")
             return 1
         print("版本信息已更新")
 
-        # 发送 Telegram 通知
-        translated = translate_changelog(latest_content)
+        # 发送 Telegram 通知（翻译走磁盘缓存：通知失败后的重跑不再请求 LLM）
+        from core.notify.telegram import send_bilingual_notification
+        from core.translate import cached_translate, flush_translation_cache
+
+        translated = cached_translate(latest_content)
+        flush_translation_cache()
         notify_result = send_bilingual_notification(
             version=latest_version,
             original=latest_content,
@@ -335,7 +367,7 @@ def main():
         # 保存消息状态（用于后续内容更新时编辑消息）
         if notify_result["message_ids"]:
             body_hash = compute_body_hash(latest_content)
-            if not save_message_state(latest_version, notify_result["message_ids"], body_hash):
+            if not _STATE.save_message_state(latest_version, notify_result["message_ids"], body_hash):
                 print("⚠️ 消息状态保存失败（不影响主流程）")
             else:
                 print(f"消息状态已保存 (message_ids: {notify_result['message_ids']})")
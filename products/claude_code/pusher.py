@@ -9,7 +9,7 @@ import argparse
 import os
 import re
 import sys
-import time
+from concurrent.futures import ThreadPoolExecutor
 import requests
 
 # 加载 .env 文件
@@ -18,8 +18,9 @@ load_dotenv()
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from core.notify.telegram import send_bilingual_notification
-from core.translate import translate_changelog
+from core.utils import conditional_get, make_session
+
+# core.translate 会引入 litellm 等重量级依赖，延迟到确认有版本要推送后再导入
 
 # 配置
 CHANGELOG_URL = "https://raw.githubusercontent.com/anthropics/claude-code/refs/heads/main/CHANGELOG.md"
@@ -31,56 +32,63 @@ PUSHED_VERSIONS_FILE = os.path.join(PROJECT_ROOT, "output", "claude_code_pushed_
 TELEGRAM_BOT_TOKEN = os.getenv("CLAUDE_CODE_BOT_TOKEN", "")
 TELEGRAM_CHAT_ID = os.getenv("CLAUDE_CODE_CHAT_ID", "")
 
-# 推送间隔（秒）
+# 推送限速：平均间隔（秒）和允许的突发条数
 PUSH_DELAY = 3
+PUSH_BURST = 5
 # 推送失败重试次数
 MAX_RETRY = 3
+# 翻译预取并发数：翻译耗时以秒计且互相独立，提前并发执行，
+# 让后续版本的翻译与当前版本的发送重叠
+TRANSLATE_WORKERS = 3
+# 每个预取任务打包的版本数，与批量翻译单次请求的打包条数一致：
+# 一组版本共享一次 LLM 往返和一份规则前导
+TRANSLATE_BATCH = 6
+
+
+# 带重试的 Session：瞬时 5xx/429 在 urllib3 层指数退避重试
+# （Retry-After 头默认生效），不再直接放弃整次推送
+_SESSION = make_session()
 
 
 def fetch_changelog():
-    """从 GitHub 获取 CHANGELOG.md 内容"""
+    """从 GitHub 获取 CHANGELOG.md 内容
+
+    条件请求：CHANGELOG 未变化时服务端返回 304，正文直接取
+    output/http_cache.json 里的缓存副本，不重复下载几十 KB 全文
+    """
     try:
-        response = requests.get(CHANGELOG_URL, timeout=10)
-        response.raise_for_status()
-        return response.text
+        status_code, body = conditional_get(CHANGELOG_URL, timeout=10, session=_SESSION)
+        if status_code != 200:
+            print(f"获取更新日志失败: HTTP {status_code}")
+            return None
+        return body
     except requests.RequestException as e:
         print(f"获取更新日志失败: {e}")
         return None
 
 
+# 版本标题行（如 "## 2.1.49"）
+_VERSION_HEADING_RE = re.compile(r'^## (\d+\.\d+\.\d+)', re.MULTILINE)
+
+
 def parse_all_versions(changelog_text):
     """
     解析所有版本号和更新内容
     返回: [(version, content), ...]，从旧到新排序
+
+    用 finditer 直接在全文定位版本标题，按相邻标题的偏移切片，
+    不做逐行拆分和重新拼接
     """
-    version_pattern = r'^## (\d+\.\d+\.\d+)'
-    lines = changelog_text.split('\n')
+    matches = list(_VERSION_HEADING_RE.finditer(changelog_text))
 
     versions = []
-    current_version = None
-    current_lines = []
-
-    for line in lines:
-        match = re.match(version_pattern, line)
-        if match:
-            # 保存上一个版本
-            if current_version:
-                content = '\n'.join(current_lines).strip()
-                versions.append((current_version, content))
-
-            # 开始新版本
-            current_version = match.group(1)
-            current_lines = [line]
-        elif current_version:
-            current_lines.append(line)
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(changelog_text)
+        versions.append((match.group(1), changelog_text[match.start():end].strip()))
 
-    # 保存最后一个版本
-    if current_version:
-        content = '\n'.join(current_lines).strip()
-        versions.append((current_version, content))
-
-    # 返回从旧到新的顺序（反转列表）
-    return list(reversed(versions))
+    # 返回从旧到新的顺序（原地反转，不复制列表）
+    versions.reverse()
+    return versions
 
 
 def read_pushed_versions():
@@ -97,17 +105,32 @@ def read_pushed_versions():
         return set()
 
 
-def append_pushed_version(version):
-    """追加版本到记录文件"""
-    try:
+class PushedVersionsLog:
+    """
+    已推送版本记录
+    整个推送过程持有同一个追加句柄（行缓冲），避免逐版本开关文件
+    """
+
+    def __enter__(self):
         os.makedirs(os.path.dirname(PUSHED_VERSIONS_FILE), exist_ok=True)
-        with open(PUSHED_VERSIONS_FILE, 'a', encoding='utf-8') as f:
-            f.write(f"{version}\n")
-        return True
-    except Exception as e:
-        print(f"记录推送版本失败: {e}")
+        self._f = open(PUSHED_VERSIONS_FILE, 'a', encoding='utf-8', buffering=1)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._f.close()
         return False
 
+    def record(self, version):
+        """追加版本到记录文件（每条 fsync，崩溃不丢已推送记录）"""
+        try:
+            self._f.write(f"{version}\n")
+            # 行缓冲已写到内核，再 fsync 确保掉电也不会重推该版本
+            os.fsync(self._f.fileno())
+            return True
+        except Exception as e:
+            print(f"记录推送版本失败: {e}")
+            return False
+
 
 def main(max_count=3, push_all=False):
     """
@@ -143,49 +166,74 @@ def main(max_count=3, push_all=False):
         pending_versions = pending_versions[:max_count]
         print(f"本次推送 {len(pending_versions)} 个版本")
 
+    from core.notify.telegram import send_bilingual_notification
+    from core.translate import cached_translate_batch, flush_translation_cache
+    from core.utils import TokenBucket
+
     print("-" * 50)
 
     # 逐个推送
+    # 令牌桶限速：前几条可以连发，桶空后按平均间隔补充，替代固定 sleep
+    bucket = TokenBucket(rate=1.0 / PUSH_DELAY, burst=PUSH_BURST)
     success_count = 0
-    for i, (version, content) in enumerate(pending_versions, 1):
-        print(f"\n[{i}/{len(pending_versions)}] 推送版本 {version}...")
-
-        # 翻译内容
-        print("  正在翻译...")
-        translated = translate_changelog(content)
-
-        # 发送通知（带重试）
-        result = False
-        for retry in range(MAX_RETRY):
-            if retry > 0:
-                print(f"  第 {retry + 1} 次重试...")
-                time.sleep(PUSH_DELAY)
-
-            print("  正在发送通知...")
-            result = send_bilingual_notification(
-                version=version,
-                original=content,
-                translated=translated,
-                title="Claude Code",
-                bot_token=TELEGRAM_BOT_TOKEN,
-                chat_id=TELEGRAM_CHAT_ID
-            )
+    # 翻译预取：按 TRANSLATE_BATCH 个版本为一组批量翻译（一组共享
+    # 一次 LLM 往返），各组在线程池里提前并发执行，和前面版本的发送
+    # 重叠；发送本身仍严格串行过令牌桶，Telegram 侧的限速语义不变
+    with ThreadPoolExecutor(max_workers=TRANSLATE_WORKERS) as translate_pool, \
+            PushedVersionsLog() as pushed_log:
+        translate_futures = [
+            translate_pool.submit(
+                cached_translate_batch,
+                [c for _, c in pending_versions[start:start + TRANSLATE_BATCH]])
+            for start in range(0, len(pending_versions), TRANSLATE_BATCH)
+        ]
+        for i, (version, content) in enumerate(pending_versions, 1):
+            print(f"\n[{i}/{len(pending_versions)}] 推送版本 {version}...")
+
+            # 翻译内容（所在批次预取未完成时在此等待）
+            print("  正在翻译...")
+            translated = translate_futures[(i - 1) // TRANSLATE_BATCH].result()[
+                (i - 1) % TRANSLATE_BATCH]
+
+            # 发送通知（带重试；被限流时按 Telegram 返回的 retry_after 退避）
+            result = False
+            retry_after = 0
+            for retry in range(MAX_RETRY):
+                if retry > 0:
+                    wait = retry_after if retry_after else PUSH_DELAY
+                    print(f"  第 {retry + 1} 次重试（等待 {wait} 秒）...")
+                    bucket.penalize(wait)
+
+                bucket.acquire()
+                print("  正在发送通知...")
+                result = send_bilingual_notification(
+                    version=version,
+                    original=content,
+                    translated=translated,
+                    title="Claude Code",
+                    bot_token=TELEGRAM_BOT_TOKEN,
+                    chat_id=TELEGRAM_CHAT_ID
+                )
+
+                if result["success"]:
+                    break
+                retry_after = result.get("retry_after", 0)
 
             if result["success"]:
+                # 记录已推送（同时更新内存中的集合，保持过滤逻辑一致）
+                pushed_log.record(version)
+                pushed_versions.add(version)
+                success_count += 1
+                print(f"  [OK] 版本 {version} 推送成功")
+            else:
+                print(f"  [FAIL] 版本 {version} 推送失败，已重试 {MAX_RETRY} 次，停止运行")
+                # 取消尚未开始的预取翻译，避免中止后继续烧 LLM 调用
+                for future in translate_futures:
+                    future.cancel()
                 break
 
-        if result["success"]:
-            # 记录已推送
-            append_pushed_version(version)
-            success_count += 1
-            print(f"  [OK] 版本 {version} 推送成功")
-        else:
-            print(f"  [FAIL] 版本 {version} 推送失败，已重试 {MAX_RETRY} 次，停止运行")
-            break
-
-        # 延迟（最后一个不需要延迟）
-        if i < len(pending_versions):
-            time.sleep(PUSH_DELAY)
+    # 本次新产生的翻译统一刷盘，中断重跑时可直接命中缓存
+    flush_translation_cache()
 
     print("-" * 50)
     print(f"推送完成: 成功 {success_count}/{len(pending_versions)}")
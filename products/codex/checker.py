@@ -6,13 +6,15 @@ OpenAI Codex 版本更新检查脚本
 """
 
 import argparse
+import html
+import io
+import json
 import os
 import re
 import sys
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
 import requests
-import json
-import hashlib
 
 # 加载 .env 文件
 from dotenv import load_dotenv
@@ -20,10 +22,12 @@ load_dotenv()
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from core.notify.telegram import send_bilingual_notification, edit_bilingual_notification
-from core.notify.telegraph import _strip_changelog_section
-from core.translate import translate_changelog
-from core.utils import clean_release_body
+from core.utils import clean_release_body, conditional_get, make_session
+from core.state import TrackerState, compute_body_hash
+
+# core.translate 会引入 litellm 等重量级依赖，延迟到真正需要发通知的分支再导入，
+# 让"无新版本 / 304"的快速路径省掉这部分冷启动时间
+# （core.utils 只依赖 re，解析路径每次都用，保留在顶层）
 
 # 配置
 RELEASES_ATOM_URL = "https://github.com/openai/codex/releases.atom"
@@ -32,6 +36,7 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(os.path.dirname(SCRIPT_DIR))
 VERSION_FILE = os.path.join(PROJECT_ROOT, "output", "codex_latest_version.txt")
 MESSAGE_STATE_FILE = os.path.join(PROJECT_ROOT, "output", "codex_message_state.json")
+ETAG_FILE = os.path.join(PROJECT_ROOT, "output", "codex_feed.etag")
 
 # GitHub API 配置
 GITHUB_TOKEN = os.getenv("GH_TOKEN", "")  # 使用 GH_TOKEN 避免与 GitHub Actions 的 GITHUB_TOKEN 冲突
@@ -43,6 +48,17 @@ TELEGRAM_CHAT_ID = os.getenv("CODEX_CHAT_ID", "")
 
 # Atom 命名空间
 ATOM_NS = {"atom": "http://www.w3.org/2005/Atom"}
+ATOM_ENTRY_TAG = "{http://www.w3.org/2005/Atom}entry"
+
+# 复用同一个 Session，利用连接池；带重试适配器，瞬时 5xx/连接错误自动退避重试
+_SESSION = make_session()
+
+# 本地状态（版本记录、ETag、消息状态）的读写统一走共享实现
+_STATE = TrackerState(VERSION_FILE, MESSAGE_STATE_FILE, ETAG_FILE)
+
+# HTML 清理用的预编译正则（clean_html_content 每个 release 都会调用）
+_LI_TAG_RE = re.compile(r'<li[^>]*>')
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
 
 # 常见的不稳定版本关键词
 UNSTABLE_KEYWORDS = [
@@ -50,11 +66,16 @@ UNSTABLE_KEYWORDS = [
     "dev", "nightly", "snapshot", "test"
 ]
 
+# 整词匹配（允许紧跟数字，覆盖 rc1/beta2 这类写法）：
+# 单遍扫描替代逐关键词的子串查找，同时避免 "prepared" 命中 "pre"、
+# "development" 命中 "dev" 这类误判——每次误判都白费一次 API 验证
+_UNSTABLE_RE = re.compile(
+    r'\b(?:' + '|'.join(UNSTABLE_KEYWORDS) + r')\d*\b', re.IGNORECASE)
+
 
 def is_unstable_title(title):
-    """快速判断标题是否包含常见的不稳定版本关键词"""
-    title_lower = title.lower()
-    return any(keyword in title_lower for keyword in UNSTABLE_KEYWORDS)
+    """快速判断标题是否包含常见的不稳定版本关键词（整词匹配）"""
+    return _UNSTABLE_RE.search(title) is not None
 
 
 def github_headers():
@@ -77,9 +98,16 @@ def extract_tag_name(link, fallback_title):
     return fallback_title
 
 
+# 单次运行内按 tag 记住 API 探测结果：feed 中重复出现的 tag、
+# resolve_saved_version_to_tag 重复探测解析器已查过的 tag 都不再上网。
+# 值为 (HTTP 状态码, 解析后的 release 数据或 None)；瞬时故障（网络
+# 错误、5xx、JSON 解析失败）不缓存，下次调用重新探测
+_verify_cache = {}
+
+
 def verify_release_via_api(tag_name):
     """
-    调用 GitHub API 验证是否为稳定 release
+    调用 GitHub API 验证是否为稳定 release（同一 tag 单次运行内只查一次）
 
     返回:
         (release_data, status) 元组
@@ -88,34 +116,45 @@ def verify_release_via_api(tag_name):
                   "rate_limited" | "server_error" | "network_error" |
                   "json_error" | "api_error_<code>"
     """
-    api_url = GITHUB_RELEASE_BY_TAG_URL.format(tag=tag_name)
+    cached = _verify_cache.get(tag_name)
+    if cached is not None:
+        status_code, data = cached
+    else:
+        api_url = GITHUB_RELEASE_BY_TAG_URL.format(tag=tag_name)
 
-    try:
-        resp = requests.get(api_url, headers=github_headers(), timeout=10)
-    except requests.RequestException as e:
-        print(f"  [验证失败] 网络错误: {e}")
-        return None, "network_error"
+        try:
+            # 条件请求：release 未变化时 GitHub 返回 304（不计速率限制），
+            # 响应体从本地缓存取
+            status_code, body = conditional_get(
+                api_url, headers=github_headers(), timeout=10, session=_SESSION)
+        except requests.RequestException as e:
+            print(f"  [验证失败] 网络错误: {e}")
+            return None, "network_error"
+
+        data = None
+        if status_code == 200:
+            try:
+                data = json.loads(body)
+            except ValueError as e:
+                print(f"  [验证失败] JSON 解析错误: {e}")
+                return None, "json_error"
+
+        if status_code < 500:
+            _verify_cache[tag_name] = (status_code, data)
 
     # 处理不同的状态码
-    if resp.status_code == 404:
+    if status_code == 404:
         return None, "tag_only"
-    if resp.status_code == 403:
+    if status_code == 403:
         return None, "rate_limited"
-    if resp.status_code == 401:
+    if status_code == 401:
         # 认证失败是严重错误，应该立即失败
         return None, "auth_error"
-    if resp.status_code >= 500:
+    if status_code >= 500:
         return None, "server_error"
-    if resp.status_code != 200:
+    if status_code != 200:
         # 其他 4xx 错误（如 422）也是严重问题
-        return None, f"api_error_{resp.status_code}"
-
-    # 解析响应
-    try:
-        data = resp.json()
-    except ValueError as e:
-        print(f"  [验证失败] JSON 解析错误: {e}")
-        return None, "json_error"
+        return None, f"api_error_{status_code}"
 
     # 检查 draft 和 prerelease 标志
     if data.get("draft", False):
@@ -150,16 +189,52 @@ def sanitize_xml(xml_text):
     return cleaned
 
 
-def fetch_releases_feed():
-    """从 GitHub 获取 releases Atom feed"""
+
+
+# 本轮请求拿到的新 ETag：检查全程成功后才由 main 持久化。
+# 提前落盘的话，后续解析/验证一旦失败，下轮 cron 会拿到 304 走
+# "无需检查" 的早退路径，把一次瞬时失败固化成通知永久丢失
+_pending_etag = None
+
+
+def fetch_releases_feed(use_etag=True):
+    """
+    从 GitHub 获取 releases Atom feed
+
+    通过 If-None-Match 条件请求实现增量拉取：feed 未变化时 GitHub 返回 304。
+
+    Args:
+        use_etag: 是否发送本地缓存的 ETag（强制模式等必须拿到内容时传 False）
+
+    Returns:
+        (feed_xml, error, not_modified) 元组
+    """
+    global _pending_etag
+
+    headers = {}
+    if use_etag:
+        etag = _STATE.read_etag()
+        if etag:
+            headers["If-None-Match"] = etag
+
     try:
-        response = requests.get(RELEASES_ATOM_URL, timeout=10)
+        response = _SESSION.get(RELEASES_ATOM_URL, headers=headers, timeout=10)
+        if response.status_code == 304:
+            return None, None, True
         response.raise_for_status()
+        _pending_etag = response.headers.get("ETag")
         # 清理非法 XML 字符（如 Form Feed \x0c 等）
-        return sanitize_xml(response.text), None
+        return sanitize_xml(response.text), None, False
     except requests.RequestException as e:
         print(f"获取 releases feed 失败: {e}")
-        return None, f"fetch_feed_error: {e}"
+        return None, f"fetch_feed_error: {e}", False
+
+
+def _iter_entries(feed_xml):
+    """增量解析 feed，逐个产出 (event, entry) 而不构建完整 DOM"""
+    for event, elem in ET.iterparse(io.StringIO(feed_xml), events=('end',)):
+        if elem.tag == ATOM_ENTRY_TAG:
+            yield event, elem
 
 
 def parse_latest_stable_release(feed_xml):
@@ -174,90 +249,94 @@ def parse_latest_stable_release(feed_xml):
         - link: Release 链接
         - error: 错误信息（API 故障时）或 None
     """
+    api_errors = []  # 记录 API 错误
+    found_stable = None  # 记录找到的稳定版本
+
+    # 流式解析：逐个 <entry> 处理，找到稳定版本后立即停止
+    # 无需把整个 feed 解析成 DOM 再 findall
     try:
-        root = ET.fromstring(feed_xml)
+        for _, entry in _iter_entries(feed_xml):
+            title_elem = entry.find("atom:title", ATOM_NS)
+            if title_elem is None:
+                entry.clear()
+                continue
+
+            title = title_elem.text.strip()
+
+            # 第一步：快速过滤常见的不稳定版本
+            if is_unstable_title(title):
+                print(f"  [跳过] {title} (包含不稳定关键词)")
+                entry.clear()
+                continue
+
+            # 获取链接和 tag 名称（临时，用于 API 查询）
+            link_elem = entry.find("atom:link", ATOM_NS)
+            link = link_elem.get("href") if link_elem is not None else ""
+            tag_name_from_url = extract_tag_name(link, title)
+
+            # 获取更新内容
+            content_elem = entry.find("atom:content", ATOM_NS)
+            content = ""
+            if content_elem is not None and content_elem.text:
+                content = clean_html_content(content_elem.text)
+
+            # 当前条目的内容已提取完毕，释放元素内存
+            entry.clear()
+
+            # 第二步：通过 API 验证是否为稳定 release
+            print(f"  [验证] {title} (tag: {tag_name_from_url})")
+            release_data, status = verify_release_via_api(tag_name_from_url)
+
+            # 致命错误：立即返回，不继续尝试其他条目
+            if status in ("auth_error", "json_error"):
+                error_msg = {
+                    "auth_error": "GitHub 认证失败（Token 无效或过期）",
+                    "json_error": "API 响应解析失败",
+                }.get(status, status)
+                print(f"  [致命错误] {title} ({error_msg})")
+                return None, None, None, None, f"fatal_error: {status}"
+
+            # 可恢复错误：记录并继续，但最终会返回错误（即使找到了稳定版本）
+            if status in ("rate_limited", "server_error", "network_error"):
+                error_msg = {
+                    "rate_limited": "API 速率限制",
+                    "server_error": "GitHub API 服务器错误",
+                    "network_error": "网络错误",
+                }.get(status, status)
+                print(f"  [警告] {title} ({error_msg})")
+                api_errors.append(f"{title}: {status}")
+                continue
+
+            # 其他 API 错误码（如 422）- 也视为致命错误
+            if status.startswith("api_error_"):
+                error_code = status.replace("api_error_", "")
+                print(f"  [致命错误] {title} (API 错误码: {error_code})")
+                return None, None, None, None, f"fatal_error: {status}"
+
+            if status == "stable":
+                # 使用 API 返回的规范 tag name（而非从 URL 解析）
+                canonical_tag = release_data.get("tag_name", tag_name_from_url)
+                print(f"  [确认] 这是一个稳定版本 ✓ (规范 tag: {canonical_tag})")
+
+                # 记录找到的稳定版本，但不立即返回（需要检查是否有 API 错误）
+                if found_stable is None:
+                    found_stable = (canonical_tag, title, content, link)
+
+                # 找到第一个稳定版本后就停止（后面的 XML 不再解析）
+                break
+
+            # 记录跳过原因（tag_only, draft, prerelease）
+            status_messages = {
+                "tag_only": "仅有 tag，无 release 对象",
+                "draft": "Draft release",
+                "prerelease": "Prerelease",
+            }
+            reason = status_messages.get(status, status)
+            print(f"  [跳过] {title} ({reason})")
     except ET.ParseError as e:
         print(f"解析 XML 失败: {e}")
         return None, None, None, None, f"xml_parse_error: {e}"
 
-    entries = root.findall("atom:entry", ATOM_NS)
-    api_errors = []  # 记录 API 错误
-    found_stable = None  # 记录找到的稳定版本
-
-    for entry in entries:
-        title_elem = entry.find("atom:title", ATOM_NS)
-        if title_elem is None:
-            continue
-
-        title = title_elem.text.strip()
-
-        # 第一步：快速过滤常见的不稳定版本
-        if is_unstable_title(title):
-            print(f"  [跳过] {title} (包含不稳定关键词)")
-            continue
-
-        # 获取链接和 tag 名称（临时，用于 API 查询）
-        link_elem = entry.find("atom:link", ATOM_NS)
-        link = link_elem.get("href") if link_elem is not None else ""
-        tag_name_from_url = extract_tag_name(link, title)
-
-        # 获取更新内容
-        content_elem = entry.find("atom:content", ATOM_NS)
-        content = ""
-        if content_elem is not None and content_elem.text:
-            content = clean_html_content(content_elem.text)
-
-        # 第二步：通过 API 验证是否为稳定 release
-        print(f"  [验证] {title} (tag: {tag_name_from_url})")
-        release_data, status = verify_release_via_api(tag_name_from_url)
-
-        # 致命错误：立即返回，不继续尝试其他条目
-        if status in ("auth_error", "json_error"):
-            error_msg = {
-                "auth_error": "GitHub 认证失败（Token 无效或过期）",
-                "json_error": "API 响应解析失败",
-            }.get(status, status)
-            print(f"  [致命错误] {title} ({error_msg})")
-            return None, None, None, None, f"fatal_error: {status}"
-
-        # 可恢复错误：记录并继续，但最终会返回错误（即使找到了稳定版本）
-        if status in ("rate_limited", "server_error", "network_error"):
-            error_msg = {
-                "rate_limited": "API 速率限制",
-                "server_error": "GitHub API 服务器错误",
-                "network_error": "网络错误",
-            }.get(status, status)
-            print(f"  [警告] {title} ({error_msg})")
-            api_errors.append(f"{title}: {status}")
-            continue
-
-        # 其他 API 错误码（如 422）- 也视为致命错误
-        if status.startswith("api_error_"):
-            error_code = status.replace("api_error_", "")
-            print(f"  [致命错误] {title} (API 错误码: {error_code})")
-            return None, None, None, None, f"fatal_error: {status}"
-
-        if status == "stable":
-            # 使用 API 返回的规范 tag name（而非从 URL 解析）
-            canonical_tag = release_data.get("tag_name", tag_name_from_url)
-            print(f"  [确认] 这是一个稳定版本 ✓ (规范 tag: {canonical_tag})")
-
-            # 记录找到的稳定版本，但不立即返回（需要检查是否有 API 错误）
-            if found_stable is None:
-                found_stable = (canonical_tag, title, content, link)
-
-            # 找到第一个稳定版本后就停止
-            break
-
-        # 记录跳过原因（tag_only, draft, prerelease）
-        status_messages = {
-            "tag_only": "仅有 tag，无 release 对象",
-            "draft": "Draft release",
-            "prerelease": "Prerelease",
-        }
-        reason = status_messages.get(status, status)
-        print(f"  [跳过] {title} ({reason})")
-
     # 如果遇到 API 错误，即使找到了稳定版本也要报告
     if api_errors:
         error_summary = "; ".join(api_errors[:3])  # 只显示前 3 个
@@ -274,106 +353,53 @@ def parse_latest_stable_release(feed_xml):
 def clean_html_content(html_text):
     """清理 HTML 标签，提取纯文本，然后调用共享清理函数"""
     # 1. 先处理 HTML 实体（原始内容是 &lt;li&gt; 形式，可能有双重编码）
-    clean = html_text
-    # 处理可能的双重编码（&amp;amp; → &amp; → &）
-    while '&amp;' in clean:
-        clean = clean.replace('&amp;', '&')
-    clean = clean.replace('&lt;', '<').replace('&gt;', '>')
-    clean = clean.replace('&quot;', '"').replace('&#39;', "'")
+    # html.unescape 是 C 实现的单遍替换，还顺带覆盖所有命名/数字实体；
+    # 调用两次以展开 &amp;lt; 这类双重编码
+    clean = html.unescape(html.unescape(html_text))
     # 2. 将 <li> 标签转换为换行+列表符号（使用 ASCII 字符兼容 Windows GBK 终端）
-    clean = re.sub(r'<li[^>]*>', '\n- ', clean)
+    clean = _LI_TAG_RE.sub('\n- ', clean)
     # 3. 移除其他 HTML 标签
-    clean = re.sub(r'<[^>]+>', '', clean)
+    clean = _HTML_TAG_RE.sub('', clean)
     # 4. 调用共享清理函数进行进一步处理
     return clean_release_body(clean)
 
 
-def read_saved_version():
-    """读取本地保存的版本号"""
-    if not os.path.exists(VERSION_FILE):
-        return None
-
-    try:
-        with open(VERSION_FILE, 'r', encoding='utf-8') as f:
-            return f.read().strip()
-    except Exception as e:
-        print(f"读取本地版本文件失败: {e}")
-        return None
 
 
-def save_version(version):
-    """保存版本号到本地文件"""
-    try:
-        os.makedirs(os.path.dirname(VERSION_FILE), exist_ok=True)
-        with open(VERSION_FILE, 'w', encoding='utf-8') as f:
-            f.write(version)
-        return True
-    except Exception as e:
-        print(f"保存版本信息失败: {e}")
-        return False
 
 
-def compute_body_hash(body):
-    """计算 body 内容的 hash 值"""
-    if not body:
-        return ""
-    return hashlib.md5(body.encode('utf-8')).hexdigest()
 
 
-def read_message_state():
+def _probe_tag(possible_tag):
     """
-    读取消息状态文件
+    探测单个候选 tag 是否存在（内部辅助函数）
 
     Returns:
-        dict: {"version": str, "message_ids": list, "body_hash": str} 或 None
+        (status, data) 元组；status 为 HTTP 状态码或 "network_error"，
+        200 时 data 为解析后的 release 数据
     """
-    if not os.path.exists(MESSAGE_STATE_FILE):
-        return None
+    cached = _verify_cache.get(possible_tag)
+    if cached is not None:
+        return cached
 
+    api_url = GITHUB_RELEASE_BY_TAG_URL.format(tag=possible_tag)
     try:
-        with open(MESSAGE_STATE_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"读取消息状态文件失败: {e}")
-        return None
-
+        # Session 的连接池是线程安全的，三个候选探测可以并发共用
+        resp = _SESSION.get(api_url, headers=github_headers(), timeout=5)
+    except requests.RequestException:
+        return "network_error", None
 
-def save_message_state(version, message_ids, body_hash):
-    """
-    保存消息状态到文件
+    if resp.status_code == 200:
+        try:
+            result = (200, resp.json())
+        except ValueError:
+            return "json_error", None
+    else:
+        result = (resp.status_code, None)
 
-    Args:
-        version: 版本号
-        message_ids: Telegram 消息 ID 列表
-        body_hash: body 内容的 hash 值
-    """
-    try:
-        os.makedirs(os.path.dirname(MESSAGE_STATE_FILE), exist_ok=True)
-        state = {
-            "version": version,
-            "message_ids": message_ids,
-            "body_hash": body_hash
-        }
-        with open(MESSAGE_STATE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(state, f, ensure_ascii=False, indent=2)
-        return True
-    except Exception as e:
-        print(f"保存消息状态失败: {e}")
-        return False
-
-
-def clear_message_state():
-    """
-    清理消息状态文件（用于消息已删除等无法恢复的情况）
-    """
-    try:
-        if os.path.exists(MESSAGE_STATE_FILE):
-            os.remove(MESSAGE_STATE_FILE)
-            print("消息状态已清理")
-        return True
-    except Exception as e:
-        print(f"清理消息状态失败: {e}")
-        return False
+    if resp.status_code < 500:
+        _verify_cache[possible_tag] = result
+    return result
 
 
 def resolve_saved_version_to_tag(saved_version):
@@ -394,32 +420,42 @@ def resolve_saved_version_to_tag(saved_version):
         f"v{saved_version}",
     ]
 
-    network_errors = 0
-    api_errors = 0
-
+    # 若候选 tag 已被 feed 解析器验证过（单次运行内的缓存命中），
+    # 直接复用结果，免去整轮探测；遇到未知候选即止，不越序短路
     for possible_tag in possible_tags:
-        api_url = GITHUB_RELEASE_BY_TAG_URL.format(tag=possible_tag)
-        try:
-            resp = requests.get(api_url, headers=github_headers(), timeout=5)
+        cached = _verify_cache.get(possible_tag)
+        if cached is None:
+            break
+        if cached[0] == 200:
+            canonical_tag = cached[1].get("tag_name", possible_tag)
+            if canonical_tag != saved_version:
+                print(f"  [迁移] 解析旧版本 '{saved_version}' → tag '{canonical_tag}'")
+            return canonical_tag, canonical_tag != saved_version, None
 
-            if resp.status_code == 401:
-                # 认证失败，应该报错
-                return saved_version, False, "auth_error"
+    # 三个候选 tag 的探测互相独立，用线程池并发发出，总耗时从
+    # 三次串行往返缩到约一次；结果仍按候选顺序取第一个命中
+    with ThreadPoolExecutor(max_workers=len(possible_tags)) as executor:
+        results = list(executor.map(_probe_tag, possible_tags))
+
+    network_errors = 0
+    api_errors = 0
 
-            if resp.status_code == 200:
-                data = resp.json()
-                canonical_tag = data.get("tag_name", possible_tag)
-                # 只有当解析出的 tag 与原值不同时才显示迁移消息
-                if canonical_tag != saved_version:
-                    print(f"  [迁移] 解析旧版本 '{saved_version}' → tag '{canonical_tag}'")
-                return canonical_tag, canonical_tag != saved_version, None
+    for possible_tag, (status, data) in zip(possible_tags, results):
+        if status == 401:
+            # 认证失败，应该报错
+            return saved_version, False, "auth_error"
 
-            if resp.status_code >= 500:
-                api_errors += 1
+        if status == 200:
+            canonical_tag = data.get("tag_name", possible_tag)
+            # 只有当解析出的 tag 与原值不同时才显示迁移消息
+            if canonical_tag != saved_version:
+                print(f"  [迁移] 解析旧版本 '{saved_version}' → tag '{canonical_tag}'")
+            return canonical_tag, canonical_tag != saved_version, None
 
-        except requests.RequestException as e:
-            # 网络错误
+        if status == "network_error":
             network_errors += 1
+        elif isinstance(status, int) and status >= 500:
+            api_errors += 1
 
     # 如果所有尝试都失败了（网络错误或服务器错误）
     if network_errors > 0 or api_errors > 0:
@@ -450,6 +486,17 @@ def main():
                        help="强制推送最新版本（跳过版本比对，不更新记录）")
     args = parser.parse_args()
 
+    exit_code = _run_check(args)
+
+    # 检查全程成功才持久化新 ETag；失败时保留旧值，下轮重新拉取
+    # 完整 feed 重试。强制模式不更新任何本地记录，ETag 同样不动
+    if exit_code == 0 and not args.force:
+        _STATE.save_etag(_pending_etag)
+    return exit_code
+
+
+def _run_check(args):
+    """执行一轮完整检查，返回进程退出码（ETag 持久化由 main 统一处理）"""
     print("正在检查 OpenAI Codex 更新...")
     print("-" * 50)
 
@@ -460,8 +507,15 @@ def main():
         print("⚠  未配置 GH_TOKEN，API 请求可能受速率限制")
     print("-" * 50)
 
-    # 获取 releases feed
-    feed_xml, fetch_error = fetch_releases_feed()
+    # 获取 releases feed（强制模式必须拿到内容，跳过 ETag）
+    feed_xml, fetch_error, not_modified = fetch_releases_feed(use_etag=not args.force)
+    if not_modified:
+        # 首次运行时本地没有版本记录，即使 304 也需要完整内容
+        if _STATE.read_version() is None:
+            feed_xml, fetch_error, _ = fetch_releases_feed(use_etag=False)
+        else:
+            print("Releases feed 未变化（304），无需检查")
+            return 0
     if fetch_error:
         print("-" * 50)
         print(f"⚠️  获取 feed 失败: {fetch_error}")
@@ -508,9 +562,14 @@ def main():
             print("（暂无更新说明）")
         print("-" * 50)
 
+        from core.notify.telegram import send_bilingual_notification
+        from core.notify.telegraph import _strip_changelog_section
+        from core.translate import cached_translate as translate_changelog, flush_translation_cache
+
         # 去掉 Changelog 详细列表后再翻译
         original_content = _strip_changelog_section(latest_content) if latest_content else "（暂无更新说明）"
         translated = translate_changelog(original_content) if latest_content else ""
+        flush_translation_cache()
 
         # 发送 Telegram 通知
         notify_result = send_bilingual_notification(
@@ -531,13 +590,13 @@ def main():
         return 0
 
     # 读取本地保存的版本
-    saved_version = read_saved_version()
+    saved_version = _STATE.read_version()
 
     if saved_version is None:
         # 首次运行
         print("-" * 50)
         print(f"首次运行，已记录版本 {latest_tag}")
-        save_version(latest_tag)
+        _STATE.save_version(latest_tag)
         return 0
 
     # 智能解析保存的版本为 tag（处理旧格式和 title 编辑）
@@ -566,7 +625,7 @@ def main():
 
         # 检查 body 是否有变化（用于处理开发者延迟更新 release notes 的情况）
         current_body_hash = compute_body_hash(latest_content)
-        message_state = read_message_state()
+        message_state = _STATE.read_message_state()
 
         if message_state and message_state.get("version") == latest_tag:
             saved_body_hash = message_state.get("body_hash", "")
@@ -577,9 +636,14 @@ def main():
                 print("-" * 50)
                 print("检测到 Release Notes 已更新，正在编辑之前发送的通知...")
 
+                from core.notify.telegram import edit_bilingual_notification
+                from core.notify.telegraph import _strip_changelog_section
+                from core.translate import cached_translate as translate_changelog, flush_translation_cache
+
                 # 去掉 Changelog 详细列表后再翻译
                 original_content = _strip_changelog_section(latest_content) if latest_content else "（暂无更新说明）"
                 translated = translate_changelog(original_content) if latest_content else ""
+                flush_translation_cache()
 
                 # 编辑之前发送的消息
                 edit_result = edit_bilingual_notification(
@@ -596,17 +660,17 @@ def main():
                 if edit_result["success"]:
                     print("消息编辑成功")
                     # 更新 body_hash 和可能变化的 message_ids
-                    if not save_message_state(latest_tag, edit_result["message_ids"], current_body_hash):
+                    if not _STATE.save_message_state(latest_tag, edit_result["message_ids"], current_body_hash):
                         print("⚠️ 消息状态保存失败（不影响主流程）")
                 else:
                     print("⚠️  消息编辑失败，可能消息已被删除")
                     # 清理无效状态，避免下次重复尝试编辑已删除的消息
-                    clear_message_state()
+                    _STATE.clear_message_state()
                     return 1
 
         # 如果刚刚解析了旧格式，更新版本文件
         if was_resolved:
-            save_version(latest_tag)
+            _STATE.save_version(latest_tag)
         return 0
     else:
         # 有新版本
@@ -622,14 +686,19 @@ def main():
         else:
             print("（暂无更新说明）")
         print("-" * 50)
-        if not save_version(latest_tag):
+        if not _STATE.save_version(latest_tag):
             print("⚠️ 版本记录保存失败，停止推送以避免重复")
             return 1
         print("版本信息已更新")
 
+        from core.notify.telegram import send_bilingual_notification
+        from core.notify.telegraph import _strip_changelog_section
+        from core.translate import cached_translate as translate_changelog, flush_translation_cache
+
         # 去掉 Changelog 详细列表后再翻译
         original_content = _strip_changelog_section(latest_content) if latest_content else "（暂无更新说明）"
         translated = translate_changelog(original_content) if latest_content else ""
+        flush_translation_cache()
 
         # 调试：将完整内容（含 Changelog）写入本地文件
         debug_output = os.path.join(PROJECT_ROOT, "output", "codex_debug_content.txt")
@@ -670,7 +739,7 @@ def main():
         # 保存消息状态（用于后续 body 更新时编辑消息）
         if notify_result["message_ids"]:
             body_hash = compute_body_hash(latest_content)
-            if not save_message_state(latest_tag, notify_result["message_ids"], body_hash):
+            if not _STATE.save_message_state(latest_tag, notify_result["message_ids"], body_hash):
                 print("⚠️ 消息状态保存失败（不影响主流程）")
             else:
                 print(f"消息状态已保存 (message_ids: {notify_result['message_ids']})")
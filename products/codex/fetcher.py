@@ -4,17 +4,26 @@
 拉取 OpenAI Codex 所有 releases 日志并保存到文件
 """
 
+import operator
 import os
 import re
 import sys
-import requests
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dotenv import load_dotenv
 
+# orjson 是 C 实现的 JSON 解析器，解析大响应比标准库快数倍；
+# 未安装时回退到标准库（接口兼容：loads 同样接受 bytes）
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
 load_dotenv()
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from core.utils import clean_release_body
+from core.utils import clean_release_body, make_session, atomic_write_json
 
 RELEASES_API_URL = "https://api.github.com/repos/openai/codex/releases"
 GITHUB_TOKEN = os.getenv("GH_TOKEN", "")  # 使用 GH_TOKEN 避免与 GitHub Actions 的 GITHUB_TOKEN 冲突
@@ -23,54 +32,160 @@ GITHUB_TOKEN = os.getenv("GH_TOKEN", "")  # 使用 GH_TOKEN 避免与 GitHub Act
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(os.path.dirname(SCRIPT_DIR))
 OUTPUT_FILE = os.path.join(PROJECT_ROOT, "output", "codex_releases.txt")
+# 分页响应缓存：每页的 ETag + 内容；页面未变化时 GitHub 返回 304
+# （不计入速率限制且不传 body），直接复用缓存内容
+PAGE_CACHE_FILE = os.path.join(PROJECT_ROOT, "output", "codex_releases_page_cache.json")
+
+# 复用同一个 Session，分页请求走 HTTP keep-alive；带重试适配器，
+# 瞬时 5xx/连接错误自动退避重试
+_SESSION = make_session()
+_SESSION.headers.update({"Accept": "application/vnd.github+json"})
+if GITHUB_TOKEN:
+    _SESSION.headers["Authorization"] = f"Bearer {GITHUB_TOKEN}"
+
+
+# 并发拉取分页的线程数（控制在较小值，避免触发 GitHub 二级速率限制）
+FETCH_WORKERS = 4
+
+
+def _load_page_cache():
+    """加载分页响应缓存，失败时返回空字典"""
+    if not os.path.exists(PAGE_CACHE_FILE):
+        return {}
+    try:
+        with open(PAGE_CACHE_FILE, 'r', encoding='utf-8') as f:
+            return _json.loads(f.read())
+    except Exception as e:
+        print(f"读取分页缓存失败: {e}")
+        return {}
+
+
+def _save_page_cache(cache):
+    """保存分页响应缓存（原子写入）"""
+    try:
+        atomic_write_json(PAGE_CACHE_FILE, cache)
+    except Exception as e:
+        print(f"保存分页缓存失败: {e}")
+
+
+def _slim_release(release):
+    """只保留后续流程用到的字段，缓存和内存里不背完整 API 对象（assets 等）"""
+    return {
+        "name": release.get("name"),
+        "tag_name": release.get("tag_name", ""),
+        "body": release.get("body", ""),
+        "html_url": release.get("html_url", ""),
+        "published_at": release.get("published_at", ""),
+    }
+
+
+def _fetch_page(page, per_page, cache):
+    """
+    获取单页 releases（带条件请求），返回 (releases, response)
+
+    缓存里有该页的 ETag 时发送 If-None-Match；命中 304 直接用缓存内容。
+    各线程写入 cache 的键互不相同，无需加锁。
+    """
+    url = f"{RELEASES_API_URL}?page={page}&per_page={per_page}"
+    print(f"获取第 {page} 页...")
+
+    cache_key = str(page)
+    cached = cache.get(cache_key)
+    headers = {}
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+
+    response = _SESSION.get(url, headers=headers, timeout=10)
+    if response.status_code == 304:
+        print(f"第 {page} 页未变化（304），使用缓存")
+        return cached["releases"], response
+    response.raise_for_status()
+
+    releases = [_slim_release(r) for r in _json.loads(response.content)]
+    etag = response.headers.get("ETag")
+    if etag:
+        cache[cache_key] = {"etag": etag, "releases": releases}
+    return releases, response
 
 
 def fetch_all_releases():
-    """通过 GitHub API 获取所有 releases"""
-    all_releases = []
-    page = 1
+    """
+    通过 GitHub API 获取所有 releases
+
+    先同步拉取第一页，从 Link 响应头的 rel="last" 读出总页数，
+    其余页交给线程池并发拉取（分页请求互相独立，瓶颈在网络往返）
+    """
     per_page = 100
 
-    headers = {"Accept": "application/vnd.github+json"}
     if GITHUB_TOKEN:
-        headers["Authorization"] = f"Bearer {GITHUB_TOKEN}"
         print("使用 GitHub Token 认证")
     else:
         print("警告: 未配置 GH_TOKEN，可能遇到速率限制")
 
-    while True:
-        url = f"{RELEASES_API_URL}?page={page}&per_page={per_page}"
-        print(f"获取第 {page} 页...")
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        releases = response.json()
+    page_cache = _load_page_cache()
+    first_releases, first_response = _fetch_page(1, per_page, page_cache)
+    all_releases = list(first_releases)
 
-        if not releases:
-            break
+    # Link 头形如 <...?page=5&per_page=100>; rel="last"
+    last_url = first_response.links.get('last', {}).get('url', '')
+    match = re.search(r'[?&]page=(\d+)', last_url)
+    last_page = int(match.group(1)) if match else 1
 
-        all_releases.extend(releases)
-        page += 1
+    if last_page > 1:
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+            futures = [
+                executor.submit(_fetch_page, page, per_page, page_cache)
+                for page in range(2, last_page + 1)
+            ]
+            # 按页号顺序收集，保持与串行拉取相同的结果顺序
+            for future in futures:
+                releases, _ = future.result()
+                all_releases.extend(releases)
+    elif len(first_releases) == per_page:
+        # 没有 Link 头但第一页是满的：按批并发试探后续页，
+        # 直到某页返回不足 per_page 条（说明到底了）
+        next_page = 2
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+            while True:
+                batch_pages = range(next_page, next_page + FETCH_WORKERS)
+                futures = [
+                    executor.submit(_fetch_page, page, per_page, page_cache)
+                    for page in batch_pages
+                ]
+                done = False
+                for future in futures:
+                    releases, _ = future.result()
+                    all_releases.extend(releases)
+                    if len(releases) < per_page:
+                        done = True
+                        break
+                if done:
+                    break
+                next_page += FETCH_WORKERS
 
+    _save_page_cache(page_cache)
     return all_releases
 
 
-def version_tuple(version):
-    """将版本号转换为元组用于比较"""
-    # 移除 v 前缀
-    v = version.lstrip('v')
-    # 分割版本号，只取数字部分
-    parts = re.split(r'[.-]', v)
-    result = []
-    for part in parts[:3]:  # 只取前3个数字
-        if part.isdigit():
-            result.append(int(part))
-    return tuple(result) if len(result) == 3 else None
+# 预发布后缀（如 -beta、-rc.1）的合法字符
+_SUFFIX_RE = re.compile(r'[\w.]+')
 
 
-def is_valid_version(name):
-    """检查是否是有效的语义版本号格式（如 0.3.0, 0.64.0）"""
-    # 匹配 X.Y.Z 或 X.Y.Z-beta 等格式
-    return bool(re.match(r'^\d+\.\d+\.\d+(-[\w.]+)?$', name))
+@lru_cache(maxsize=512)
+def _parse_version(name):
+    """
+    校验并解析语义版本号（如 0.3.0, 0.64.0, 0.5.0-beta）
+    纯字符串操作比正则匹配快一个数量级；结果按名称缓存，
+    同名版本（如 name 和 tag_name 相同）只解析一次。
+    返回 (major, minor, patch) 元组，格式不合法时返回 None
+    """
+    head, sep, suffix = name.partition('-')
+    if sep and not _SUFFIX_RE.fullmatch(suffix):
+        return None
+    parts = head.split('.')
+    if len(parts) != 3 or not all(part.isdigit() for part in parts):
+        return None
+    return (int(parts[0]), int(parts[1]), int(parts[2]))
 
 
 def main():
@@ -81,48 +196,70 @@ def main():
     all_releases = fetch_all_releases()
     print(f"\n共获取 {len(all_releases)} 个 releases")
 
-    # 过滤有效版本（排除 alpha 和内部构建版本）
-    stable_releases = []
+    # 过滤有效版本（排除 alpha 和内部构建版本），廉价检查在前
+    # 先只收集原始 body，清理统一放到进程池并行执行
+    kept_releases = []
     for release in all_releases:
         name = release.get("name") or release.get("tag_name", "")
 
-        # 跳过 alpha 版本
+        # 跳过 alpha 版本（子串检查最便宜，放在正则之前）
         if "alpha" in name.lower():
             continue
 
-        # 只保留有效的语义版本号格式
-        if not is_valid_version(name):
+        # 一次正则完成格式校验和版本号提取，过滤 0.3.0 之前的版本
+        vt = _parse_version(name)
+        if vt is None or vt < (0, 3, 0):
             continue
 
-        # 过滤 0.3.0 之前的版本
-        vt = version_tuple(name)
-        if vt and vt < (0, 3, 0):
-            continue
-
-        stable_releases.append({
+        kept_releases.append({
             "name": name,
-            "body": clean_release_body(release.get("body", "")),
+            "raw_body": release.get("body", ""),
             "url": release.get("html_url", ""),
             "published_at": release.get("published_at", "")
         })
 
-    # 按发布时间从早到新排序
-    stable_releases.sort(key=lambda x: x["published_at"])
+    # clean_release_body 是纯 CPU 的字符串/正则处理，受 GIL 限制，
+    # 用进程池跨核并行清理（几百个 release 的清理是主要 CPU 开销）
+    cleaned_bodies = []
+    if kept_releases:
+        with ProcessPoolExecutor() as executor:
+            cleaned_bodies = list(executor.map(
+                clean_release_body,
+                [r["raw_body"] for r in kept_releases],
+                chunksize=16
+            ))
+
+    stable_releases = [
+        {
+            "name": r["name"],
+            "body": body,
+            "url": r["url"],
+            "published_at": r["published_at"]
+        }
+        for r, body in zip(kept_releases, cleaned_bodies)
+    ]
+
+    # 按发布时间从早到新排序（ISO-8601 字符串可直接比较）
+    # API 返回基本是新到旧，Timsort 对近似逆序的输入接近线性；
+    # itemgetter 是 C 实现的取键函数，比逐元素调用 lambda 快
+    stable_releases.sort(key=operator.itemgetter('published_at'))
 
     print(f"稳定版本（>=0.3.0，排除 alpha）: {len(stable_releases)} 个")
 
-    # 输出到文件
-    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
+    # 输出到文件：先在内存拼好字节串，一次写入临时文件后原子替换，
+    # 避免逐条 write 的编码开销，也不会留下写了一半的文件
+    buf = bytearray()
+    for release in stable_releases:
+        # 版本号作为超链接
+        buf += f"## [{release['name']}]({release['url']})\n\n".encode('utf-8')
+        buf += (release['body'] or "（暂无更新说明）").encode('utf-8')
+        buf += b"\n\n" + b"=" * 60 + b"\n\n"
 
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        for release in stable_releases:
-            # 版本号作为超链接
-            f.write(f"## [{release['name']}]({release['url']})\n\n")
-            if release['body']:
-                f.write(release['body'])
-            else:
-                f.write("（暂无更新说明）")
-            f.write("\n\n" + "=" * 60 + "\n\n")
+    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
+    tmp_file = OUTPUT_FILE + ".tmp"
+    with open(tmp_file, 'wb') as f:
+        f.write(buf)
+    os.replace(tmp_file, OUTPUT_FILE)
 
     print(f"\n已保存到 {OUTPUT_FILE}")
 
@@ -7,9 +7,10 @@ OpenAI Codex 历史版本批量推送脚本
 
 import argparse
 import os
+import pickle
 import re
 import sys
-import time
+from concurrent.futures import ThreadPoolExecutor
 
 # 加载 .env 文件
 from dotenv import load_dotenv
@@ -17,39 +18,86 @@ load_dotenv()
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from core.notify.telegram import send_bilingual_notification
-from core.translate import translate_changelog
+
+# core.translate 会引入 litellm 等重量级依赖，延迟到确认有版本要推送后再导入
 
 # 配置
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(os.path.dirname(SCRIPT_DIR))
 RELEASES_FILE = os.path.join(PROJECT_ROOT, "output", "codex_releases.txt")
 PUSHED_VERSIONS_FILE = os.path.join(PROJECT_ROOT, "output", "codex_pushed_versions.txt")
+# 解析结果缓存：文件内容没变时直接读缓存，跳过正则拆分
+# 用 pickle 二进制格式存储，反序列化比重新正则解析文本快一个数量级
+PARSED_CACHE_FILE = RELEASES_FILE + ".parsed.pkl"
 
 # Telegram 配置（独立环境变量）
 TELEGRAM_BOT_TOKEN = os.getenv("CODEX_BOT_TOKEN", "")
 TELEGRAM_CHAT_ID = os.getenv("CODEX_CHAT_ID", "")
 
-# 推送间隔（秒）
+# 推送限速：平均间隔（秒）和允许的突发条数
 PUSH_DELAY = 3
+PUSH_BURST = 5
 # 推送失败重试次数
 MAX_RETRY = 3
+# 翻译预取线程数（翻译是网络调用，与发送并行可隐藏延迟）
+TRANSLATE_WORKERS = 4
+
+# 解析 codex_releases.txt 用的正则，模块加载时编译一次
+_SECTION_SPLIT_RE = re.compile(r'={10,}')
+_SECTION_TITLE_RE = re.compile(r'^##\s*\[(.+?)\]\((.+?)\)')
+
+
+def _load_parsed_cache(fingerprint):
+    """读取解析缓存，指纹不匹配或文件损坏时返回 None"""
+    if not os.path.exists(PARSED_CACHE_FILE):
+        return None
+
+    try:
+        with open(PARSED_CACHE_FILE, 'rb') as f:
+            cached = pickle.load(f)
+        if cached.get("fingerprint") == fingerprint:
+            return cached.get("releases")
+    except Exception as e:
+        print(f"读取解析缓存失败: {e}")
+    return None
+
+
+def _save_parsed_cache(fingerprint, releases):
+    """写入解析缓存（先写临时文件再替换，避免写一半被读到）"""
+    try:
+        tmp_file = PARSED_CACHE_FILE + ".tmp"
+        with open(tmp_file, 'wb') as f:
+            pickle.dump({"fingerprint": fingerprint, "releases": releases},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, PARSED_CACHE_FILE)
+    except Exception as e:
+        print(f"写入解析缓存失败: {e}")
 
 
 def parse_releases_file(filepath):
     """
     解析 codex_releases.txt 文件
     返回: [{name, body, url}, ...]
+
+    解析结果按 (mtime_ns, size) 指纹缓存到 pickle 旁路文件，
+    文件没变时直接加载缓存，省去整个文件的正则扫描
     """
     if not os.path.exists(filepath):
         print(f"文件不存在: {filepath}")
         return []
 
+    st = os.stat(filepath)
+    fingerprint = f"{st.st_mtime_ns}:{st.st_size}"
+
+    cached = _load_parsed_cache(fingerprint)
+    if cached is not None:
+        return cached
+
     with open(filepath, 'r', encoding='utf-8') as f:
         content = f.read()
 
     # 按分隔符拆分版本
-    sections = re.split(r'={10,}', content)
+    sections = _SECTION_SPLIT_RE.split(content)
     releases = []
 
     for section in sections:
@@ -58,7 +106,7 @@ def parse_releases_file(filepath):
             continue
 
         # 提取版本号和链接: ## [0.5.0](https://...)
-        match = re.match(r'^##\s*\[(.+?)\]\((.+?)\)', section)
+        match = _SECTION_TITLE_RE.match(section)
         if not match:
             continue
 
@@ -74,6 +122,7 @@ def parse_releases_file(filepath):
             "url": url
         })
 
+    _save_parsed_cache(fingerprint, releases)
     return releases
 
 
@@ -91,17 +140,30 @@ def read_pushed_versions():
         return set()
 
 
-def append_pushed_version(version):
-    """追加版本到记录文件"""
-    try:
+class PushedVersionsLog:
+    """
+    已推送版本记录
+    整个推送过程持有同一个追加句柄（行缓冲），避免逐版本开关文件
+    """
+
+    def __enter__(self):
         os.makedirs(os.path.dirname(PUSHED_VERSIONS_FILE), exist_ok=True)
-        with open(PUSHED_VERSIONS_FILE, 'a', encoding='utf-8') as f:
-            f.write(f"{version}\n")
-        return True
-    except Exception as e:
-        print(f"记录推送版本失败: {e}")
+        self._f = open(PUSHED_VERSIONS_FILE, 'a', encoding='utf-8', buffering=1)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._f.close()
         return False
 
+    def record(self, version):
+        """追加版本到记录文件"""
+        try:
+            self._f.write(f"{version}\n")
+            return True
+        except Exception as e:
+            print(f"记录推送版本失败: {e}")
+            return False
+
 
 def main(max_count=3, push_all=False):
     """
@@ -137,57 +199,79 @@ def main(max_count=3, push_all=False):
         pending_releases = pending_releases[:max_count]
         print(f"本次推送 {len(pending_releases)} 个版本")
 
+    from core.notify.telegram import send_bilingual_notification
+    from core.translate import cached_translate, flush_translation_cache
+    from core.utils import TokenBucket
+
     print("-" * 50)
 
-    # 逐个推送
+    # 逐个推送（翻译通过线程池预取，与发送流程并行；发送保持串行以保证记录顺序）
+    # 令牌桶限速：前几条可以连发，桶空后按平均间隔补充，替代固定 sleep
+    bucket = TokenBucket(rate=1.0 / PUSH_DELAY, burst=PUSH_BURST)
     success_count = 0
-    for i, release in enumerate(pending_releases, 1):
-        version = release["name"]
-        body = release["body"]
-        url = release["url"]
-
-        print(f"\n[{i}/{len(pending_releases)}] 推送版本 {version}...")
-
-        # 构建内容（不再需要在内容中包含链接，因为标题已有超链接）
-        original_content = body or "（暂无更新说明）"
-
-        # 翻译内容
-        print("  正在翻译...")
-        translated = translate_changelog(body) if body else ""
-
-        # 发送通知（带重试）
-        result = False
-        for retry in range(MAX_RETRY):
-            if retry > 0:
-                print(f"  第 {retry + 1} 次重试...")
-                time.sleep(PUSH_DELAY)
-
-            print("  正在发送通知...")
-            result = send_bilingual_notification(
-                version=version,
-                original=original_content,
-                translated=translated,
-                title="OpenAI Codex",
-                bot_token=TELEGRAM_BOT_TOKEN,
-                chat_id=TELEGRAM_CHAT_ID,
-                version_url=url
-            )
+    with PushedVersionsLog() as pushed_log, \
+            ThreadPoolExecutor(max_workers=TRANSLATE_WORKERS) as executor:
+        translate_futures = [
+            executor.submit(cached_translate, r["body"]) if r["body"] else None
+            for r in pending_releases
+        ]
+
+        for i, release in enumerate(pending_releases, 1):
+            version = release["name"]
+            body = release["body"]
+            url = release["url"]
+
+            print(f"\n[{i}/{len(pending_releases)}] 推送版本 {version}...")
+
+            # 构建内容（不再需要在内容中包含链接，因为标题已有超链接）
+            original_content = body or "（暂无更新说明）"
+
+            # 获取预取的翻译结果
+            print("  正在翻译...")
+            future = translate_futures[i - 1]
+            translated = future.result() if future else ""
+
+            # 发送通知（带重试；被限流时按 Telegram 返回的 retry_after 退避）
+            result = False
+            retry_after = 0
+            for retry in range(MAX_RETRY):
+                if retry > 0:
+                    wait = retry_after if retry_after else PUSH_DELAY
+                    print(f"  第 {retry + 1} 次重试（等待 {wait} 秒）...")
+                    bucket.penalize(wait)
+
+                bucket.acquire()
+                print("  正在发送通知...")
+                result = send_bilingual_notification(
+                    version=version,
+                    original=original_content,
+                    translated=translated,
+                    title="OpenAI Codex",
+                    bot_token=TELEGRAM_BOT_TOKEN,
+                    chat_id=TELEGRAM_CHAT_ID,
+                    version_url=url
+                )
+
+                if result["success"]:
+                    break
+                retry_after = result.get("retry_after", 0)
 
             if result["success"]:
+                # 记录已推送（同时更新内存中的集合，保持过滤逻辑一致）
+                pushed_log.record(version)
+                pushed_versions.add(version)
+                success_count += 1
+                print(f"  [OK] 版本 {version} 推送成功")
+            else:
+                print(f"  [FAIL] 版本 {version} 推送失败，已重试 {MAX_RETRY} 次，停止运行")
+                # 取消尚未开始的翻译任务，避免白白消耗 API 调用
+                for f in translate_futures:
+                    if f is not None:
+                        f.cancel()
                 break
 
-        if result["success"]:
-            # 记录已推送
-            append_pushed_version(version)
-            success_count += 1
-            print(f"  [OK] 版本 {version} 推送成功")
-        else:
-            print(f"  [FAIL] 版本 {version} 推送失败，已重试 {MAX_RETRY} 次，停止运行")
-            break
-
-        # 延迟（最后一个不需要延迟）
-        if i < len(pending_releases):
-            time.sleep(PUSH_DELAY)
+    # 本次新产生的翻译统一刷盘，中断重跑时可直接命中缓存
+    flush_translation_cache()
 
     print("-" * 50)
     print(f"推送完成: 成功 {success_count}/{len(pending_releases)}")